@@ -1,68 +1,143 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor
 from sklearn.model_selection import train_test_split
 import joblib
 import os
 
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+def _scale_and_score_numpy(X, w, invert):
+    """Min-max scale X in place and return the weighted score in one pass."""
+    mins = X.min(axis=0)
+    spans = X.max(axis=0) - mins
+    spans[spans == 0.0] = 1.0
+    X -= mins
+    X /= spans
+    return np.where(invert, 1.0 - X, X) @ w
+
+if HAVE_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _scale_and_score(X, w, invert):
+        """Fused min-max scale + invert + weighted sum, one threaded pass."""
+        n, m = X.shape
+        mins = np.empty(m, np.float32)
+        spans = np.empty(m, np.float32)
+        for j in range(m):
+            mins[j] = X[:, j].min()
+            spans[j] = X[:, j].max() - mins[j]
+            if spans[j] == 0.0:
+                spans[j] = 1.0
+        out = np.empty(n, np.float32)
+        for i in prange(n):
+            s = np.float32(0.0)
+            for j in range(m):
+                v = (X[i, j] - mins[j]) / spans[j]
+                X[i, j] = v
+                if invert[j]:
+                    v = np.float32(1.0) - v
+                s += w[j] * v
+            out[i] = s
+        return out
+else:
+    _scale_and_score = _scale_and_score_numpy
+
 def preprocess_data(input_file):
     """Preprocess the data and return features and target."""
     print(f"Loading data from {input_file}")
-    df = pd.read_csv(input_file)
+    try:
+        # Multi-threaded Arrow CSV parser reads straight into columnar buffers
+        df = pd.read_csv(input_file, engine='pyarrow')
+    except (ImportError, ValueError):
+        # Fall back to the C parser with explicit dtypes to skip type inference
+        df = pd.read_csv(
+            input_file,
+            dtype={'prix': 'float32', 'note_moyenne': 'float32', 'disponibilite': 'category'}
+        )
     
-    # Handle missing values
+    # Categorical dtype: equality tests, map and groupby run on integer codes
+    for col in ('disponibilite', 'vendeur'):
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+
+    # Handle missing values (single vectorized pass over all numeric columns)
     numeric_cols = df.select_dtypes(include=[np.number]).columns
-    for col in numeric_cols:
-        df[col].fillna(df[col].mean(), inplace=True)
+    means = df[numeric_cols].mean(numeric_only=True)
+    df.loc[:, numeric_cols] = df[numeric_cols].fillna(means)
     
     # Create estimated sales based on rating and availability
     if 'note_moyenne' in df.columns and 'disponibilite' in df.columns:
-        # Convert availability to numeric score
+        # Convert availability to numeric score (dict-map runs in C, fillna handles the default)
         dispo_map = {'En stock': 1.0, 'Rupture': 0.0}
-        df['dispo_score'] = df['disponibilite'].map(lambda x: dispo_map.get(x, 0.5))
+        df['dispo_score'] = df['disponibilite'].map(dispo_map).fillna(0.5)
         
-        # Simulate estimated sales
-        df['ventes_estimees'] = np.random.poisson(
-            df['note_moyenne'] * 10 * df['dispo_score'] + 1
-        )
+        # Simulate estimated sales: build the Poisson means in-place on a
+        # float32 buffer instead of chaining pandas Series arithmetic.
+        # copy=True matters: when the column is already float32, to_numpy
+        # returns a view of the column and the in-place ops would either
+        # corrupt note_moyenne or raise under Copy-on-Write pandas
+        rng = np.random.default_rng(42)
+        lam = df['note_moyenne'].to_numpy(dtype=np.float32, copy=True)
+        lam *= 10.0
+        lam *= df['dispo_score'].to_numpy(dtype=np.float32)
+        lam += 1.0
+        df['ventes_estimees'] = rng.poisson(lam)
     
     # Normalize features
     features = ['prix', 'note_moyenne', 'ventes_estimees', 'dispo_score']
     available_features = [f for f in features if f in df.columns]
-    
-    scaler = MinMaxScaler()
-    df[available_features] = scaler.fit_transform(df[available_features])
-    
-    # Invert price (lower is better)
-    if 'prix' in df.columns:
-        df['prix_inv'] = 1 - df['prix']
-    
-    # Calculate global score
+
+    # Calculate global score (price weight applies to the inverted scaled price)
     weights = {
         'note_moyenne': 0.4,
-        'prix_inv': 0.3,
+        'prix': 0.3,
         'ventes_estimees': 0.2,
         'dispo_score': 0.1
     }
-    
-    df['score_global'] = sum(
-        df[col] * weight for col, weight in weights.items() 
-        if col in df.columns
-    )
-    
-    # Prepare features and target
-    X = df[available_features]
-    y = df['score_global']
-    
+
+    # Fused kernel: min-max scaling, price inversion and the weighted sum
+    # happen in a single pass over a float32 matrix (JIT-compiled when
+    # numba is installed, vectorized NumPy otherwise)
+    X_mat = df[available_features].to_numpy(dtype=np.float32)
+    w = np.array([weights.get(f, 0.0) for f in available_features], dtype=np.float32)
+    invert = np.array([f == 'prix' for f in available_features])
+    df['score_global'] = _scale_and_score(X_mat, w, invert)
+    df[available_features] = X_mat
+
+    # Invert price (lower is better)
+    if 'prix' in df.columns:
+        df['prix_inv'] = 1 - df['prix']
+
+    # Sort once by score so every downstream top-K query is a cheap head(k)
+    df = df.sort_values('score_global', ascending=False, kind='stable', ignore_index=True)
+
+    # Prepare features and target as contiguous float32 arrays; sklearn's
+    # trees work in float32 internally, so this skips a float64 copy and
+    # halves the bytes moved through split/shuffle/fit
+    X = df[available_features].to_numpy(dtype=np.float32, copy=False)
+    y = df['score_global'].to_numpy(dtype=np.float32, copy=False)
+
     return X, y, df
 
 def train_model(X, y):
-    """Train a Random Forest model to predict global score."""
-    print("Training Random Forest model...")
+    """Train a histogram gradient boosting model to predict global score."""
+    print("Training HistGradientBoosting model...")
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
+
+    # Histogram-based boosting bins features into small integer histograms and
+    # trains in C with OpenMP - much faster than a 100-tree forest on this
+    # smooth linear-combination target, and the saved model is far smaller
+    model = HistGradientBoostingRegressor(
+        max_iter=100,
+        max_bins=64,
+        learning_rate=0.1,
+        early_stopping=True,
+        random_state=42
+    )
     model.fit(X_train, y_train)
     
     # Evaluate model
@@ -78,12 +153,15 @@ def save_results(model, df, output_dir):
     
     # Save model
     model_path = os.path.join(output_dir, 'product_scoring_model.joblib')
-    joblib.dump(model, model_path)
+    # Mid-level zlib compression + pickle protocol 5 (out-of-band buffers)
+    # shrink the artifact several times and speed up later joblib.load
+    joblib.dump(model, model_path, compress=3, protocol=5)
     print(f"Model saved to {model_path}")
     
     # Save top-K products
     top_k = 5
-    top_products = df.sort_values('score_global', ascending=False).head(top_k)
+    # df arrives presorted by score_global, so the top-K is just the head
+    top_products = df.head(top_k)
     output_file = os.path.join(output_dir, 'top_produits_attractifs.csv')
     top_products.to_csv(output_file, index=False)
     print(f"Top {top_k} products saved to {output_file}")
@@ -1,8 +1,10 @@
+import atexit
 import json
 import logging
 import sqlite3
 import datetime
 import os
+import threading
 
 # Configure logging
 logging.basicConfig(
@@ -16,19 +18,29 @@ class ModelContextProtocol:
         # Load permissions
         with open(permissions_file, 'r') as f:
             self.permissions = json.load(f)
-        
+
+        # Cache the hot lookups as plain attributes so request processing
+        # doesn't walk the nested permission dicts on every call
+        self._data_access = dict(self.permissions['data_access'])
+        self._capabilities = dict(self.permissions['capabilities'])
+        self._store_decisions = bool(self.permissions['audit']['store_decisions'])
+
+
         # Initialize database
         self.init_db()
         
         logging.info("MCP server initialized")
     
     def init_db(self):
-        """Initialize the audit database"""
-        conn = sqlite3.connect('mcp_audit.db')
-        cursor = conn.cursor()
-        
+        """Initialize the audit database and keep one connection open"""
+        # A single reused connection avoids re-opening the database file
+        # (and re-running journal setup) on every audit write
+        self.conn = sqlite3.connect('mcp_audit.db', check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+
         # Create audit table if it doesn't exist
-        cursor.execute('''
+        self.conn.execute('''
         CREATE TABLE IF NOT EXISTS audit_log (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             timestamp TEXT,
@@ -38,9 +50,31 @@ class ModelContextProtocol:
             explanation TEXT
         )
         ''')
-        
-        conn.commit()
-        conn.close()
+
+        self.conn.commit()
+
+        # Batch audit inserts: one cached statement, flushed in groups so the
+        # parse + commit cost is amortized across records
+        self._insert_sql = (
+            "INSERT INTO audit_log (timestamp, request_type, data_accessed, decision, explanation) "
+            "VALUES (?, ?, ?, ?, ?)"
+        )
+        self._pending = []
+        self._batch_size = 50
+
+        atexit.register(self._close_db)
+
+    def _flush_audit(self):
+        """Write any buffered audit records in a single transaction"""
+        if self._pending:
+            self.conn.executemany(self._insert_sql, self._pending)
+            self.conn.commit()
+            self._pending.clear()
+
+    def _close_db(self):
+        """Flush pending audit records and close the connection"""
+        self._flush_audit()
+        self.conn.close()
     
     def log_interaction(self, request_type, data_accessed, decision, explanation):
         """Log an interaction to both file and database"""
@@ -49,25 +83,15 @@ class ModelContextProtocol:
         # Log to file
         logging.info(f"Request: {request_type}, Data: {data_accessed}, Decision: {decision}, Explanation: {explanation}")
         
-        # Log to database
-        if self.permissions['audit']['store_decisions']:
-            conn = sqlite3.connect('mcp_audit.db')
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "INSERT INTO audit_log (timestamp, request_type, data_accessed, decision, explanation) VALUES (?, ?, ?, ?, ?)",
-                (timestamp, request_type, data_accessed, decision, explanation)
-            )
-            
-            conn.commit()
-            conn.close()
+        # Log to database (buffered; flushed in batches)
+        if self._store_decisions:
+            self._pending.append((timestamp, request_type, data_accessed, decision, explanation))
+            if len(self._pending) >= self._batch_size:
+                self._flush_audit()
     
     def check_permission(self, data_type, capability):
         """Check if the requested data access and capability are permitted"""
-        data_permitted = self.permissions['data_access'].get(data_type, False)
-        capability_permitted = self.permissions['capabilities'].get(capability, False)
-        
-        return data_permitted and capability_permitted
+        return self._data_access.get(data_type, False) and self._capabilities.get(capability, False)
     
     def process_request(self, request_type, data_type, capability, context=None):
         """Process an incoming request"""
@@ -108,8 +132,7 @@ if __name__ == "__main__":
         )
         print(f"Demo request result: {result}")
         
-        # Keep the server running
-        while True:
-            pass
+        # Keep the server running without burning a core busy-waiting
+        threading.Event().wait()
     except KeyboardInterrupt:
         print("MCP Server stopped.")
\ No newline at end of file
@@ -5,10 +5,12 @@ Permet une interaction conversationnelle avec l'analyseur de produits
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
+import io
 import os
 import traceback
 
@@ -70,6 +72,64 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_data(show_spinner=False)
+def _load_csv(csv_bytes):
+    """Parse le CSV uploadé une seule fois par contenu (mise en cache Streamlit)"""
+    df = pd.read_csv(io.BytesIO(csv_bytes), sep=';')
+    # Dtype catégoriel: value_counts/groupby/égalité opèrent sur des codes entiers
+    for col in ('disponibilite', 'vendeur'):
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
+@st.cache_data(show_spinner=False)
+def _compute_cot_stats(df):
+    """Calcule les statistiques CoT une seule fois par DataFrame (mise en cache Streamlit)"""
+    # Réductions groupées en un seul agg + corrélation sur tableaux NumPy préchargés
+    stats = df.agg({'prix': 'mean', 'score_global': 'median', 'vendeur': 'nunique'})
+    prix = df['prix'].to_numpy(dtype=float)
+    score = df['score_global'].to_numpy(dtype=float)
+    return {
+        'data_stats': {
+            'total_products': len(df),
+            'avg_price': stats['prix'],
+            'median_score': stats['score_global'],
+            'unique_vendors': int(stats['vendeur'])
+        },
+        'patterns': {
+            'price_performance_correlation': np.corrcoef(prix, score)[0, 1],
+            'top_vendor': df['vendeur'].value_counts().index[0],
+            'stock_rate': (df['disponibilite'] == 'En stock').mean()
+        },
+        'recommendations': {
+            'pricing': "Adopter une stratégie dynamique basée sur la performance",
+            'vendor': "Diversifier le portefeuille vendeurs",
+            'inventory': "Optimiser les niveaux de stock",
+            'marketing': "Concentrer sur les produits stars"
+        }
+    }
+
+
+@st.cache_data(show_spinner=False)
+def _price_histogram(df, nbins, title):
+    """Binne les prix côté serveur: seuls nbins points partent vers le navigateur"""
+    counts, edges = np.histogram(df['prix'].to_numpy(dtype=float), bins=nbins)
+    centers = 0.5 * (edges[:-1] + edges[1:])
+    fig = go.Figure(go.Bar(x=centers, y=counts, width=np.diff(edges)))
+    fig.update_layout(title=title, bargap=0)
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _vendor_stats(df):
+    """Agrège score moyen et effectif par vendeur (mise en cache Streamlit)"""
+    return df.groupby('vendeur', observed=True, as_index=False).agg(
+        score_global=('score_global', 'mean'),
+        n=('score_global', 'size')
+    )
+
+
 class CoTChatInterface:
     """Interface chat pour l'analyseur Chain of Thought"""
     
@@ -96,9 +156,9 @@ class CoTChatInterface:
         """Traite le fichier uploadé"""
         if uploaded_file is not None:
             try:
-                # Lecture du fichier
-                df = pd.read_csv(uploaded_file, sep=';')
-                
+                # Lecture du fichier (cache Streamlit: re-parse évité à chaque rerun)
+                df = _load_csv(uploaded_file.getvalue())
+
                 # Validation des colonnes
                 required_columns = ['titre', 'prix', 'note_moyenne', 'vendeur', 'disponibilite', 'score_global']
                 missing_cols = [col for col in required_columns if col not in df.columns]
@@ -118,28 +178,8 @@ class CoTChatInterface:
     def simulate_cot_analysis(self, df):
         """Simulation de l'analyse CoT (à remplacer par le vrai code)"""
         with st.spinner("🔍 Analyse Chain of Thought en cours..."):
-            # Simulation des résultats
-            analysis_results = {
-                'data_stats': {
-                    'total_products': len(df),
-                    'avg_price': df['prix'].mean(),
-                    'median_score': df['score_global'].median(),
-                    'unique_vendors': df['vendeur'].nunique()
-                },
-                'patterns': {
-                    'price_performance_correlation': df['prix'].corr(df['score_global']),
-                    'top_vendor': df['vendeur'].value_counts().index[0],
-                    'stock_rate': (df['disponibilite'] == 'En stock').mean()
-                },
-                'recommendations': {
-                    'pricing': "Adopter une stratégie dynamique basée sur la performance",
-                    'vendor': "Diversifier le portefeuille vendeurs",
-                    'inventory': "Optimiser les niveaux de stock",
-                    'marketing': "Concentrer sur les produits stars"
-                }
-            }
-            
-            return analysis_results
+            # Résultats mis en cache par Streamlit
+            return _compute_cot_stats(df)
     
     def generate_visualizations(self, df):
         """Génère les visualisations interactives"""
@@ -147,35 +187,51 @@ class CoTChatInterface:
         
         with col1:
             st.subheader("📊 Distribution des Prix")
-            fig_price = px.histogram(df, x='prix', nbins=20, 
-                                   title="Distribution des Prix")
+            fig_price = _price_histogram(df, 20, "Distribution des Prix")
             st.plotly_chart(fig_price, use_container_width=True)
         
         with col2:
             st.subheader("⭐ Scores par Vendeur")
-            vendor_scores = df.groupby('vendeur')['score_global'].mean().reset_index()
+            vendor_scores = _vendor_stats(df)
             fig_vendor = px.bar(vendor_scores, x='vendeur', y='score_global',
                               title="Score Moyen par Vendeur")
             st.plotly_chart(fig_vendor, use_container_width=True)
-        
-        # Graphique scatter prix vs score
+
+        # Graphique scatter prix vs score (échantillonné: Plotly sérialise O(N) vers le navigateur)
         st.subheader("💰 Relation Prix-Performance")
-        fig_scatter = px.scatter(df, x='prix', y='score_global', 
+        df_plot = df.sample(5000, random_state=0) if len(df) > 5000 else df
+        fig_scatter = px.scatter(df_plot, x='prix', y='score_global',
                                color='vendeur', size='note_moyenne',
                                title="Prix vs Score Global")
         st.plotly_chart(fig_scatter, use_container_width=True)
     
+    @staticmethod
+    def compute_aggregates(df):
+        """Calcule une seule fois les agrégats utilisés par les requêtes chat"""
+        return {
+            'avg_price': df['prix'].mean(),
+            'median_price': df['prix'].median(),
+            'vendor_counts': df['vendeur'].value_counts(),
+            'vendor_count': df['vendeur'].nunique(),
+            'stock_rate': (df['disponibilite'] == 'En stock').mean(),
+        }
+
     def handle_chat_query(self, user_query, df=None):
         """Gère les requêtes chat"""
         response = ""
-        
+
+        # Agrégats précalculés à l'upload: évite de re-scanner df à chaque message
+        aggs = st.session_state.get('aggs')
+        if aggs is None and df is not None:
+            aggs = self.compute_aggregates(df)
+
         # Analyse des intentions de la requête
         query_lower = user_query.lower()
-        
+
         if any(word in query_lower for word in ['prix', 'price', 'coût', 'tarif']):
             if df is not None:
-                avg_price = df['prix'].mean()
-                median_price = df['prix'].median()
+                avg_price = aggs['avg_price']
+                median_price = aggs['median_price']
                 response = f"""
                 🧠 **Analyse CoT - Pricing:**
                 
@@ -192,8 +248,9 @@ class CoTChatInterface:
         
         elif any(word in query_lower for word in ['vendeur', 'fournisseur', 'supplier']):
             if df is not None:
-                top_vendor = df['vendeur'].value_counts().index[0]
-                vendor_count = df['vendeur'].nunique()
+                vendor_counts = aggs['vendor_counts']
+                top_vendor = vendor_counts.index[0]
+                vendor_count = aggs['vendor_count']
                 response = f"""
                 🧠 **Analyse CoT - Vendeurs:**
                 
@@ -202,10 +259,10 @@ class CoTChatInterface:
                 Vendeur leader: {top_vendor}
                 
                 **Étape 2 - Analyse de concentration:**
-                Répartition: {df['vendeur'].value_counts().to_dict()}
-                
+                Répartition: {vendor_counts.to_dict()}
+
                 **Étape 3 - Recommandation:**
-                {'Diversifier le portefeuille' if df['vendeur'].value_counts().iloc[0] / len(df) > 0.5 else 'Concentration acceptable'}
+                {'Diversifier le portefeuille' if vendor_counts.iloc[0] / len(df) > 0.5 else 'Concentration acceptable'}
                 """
         
         elif any(word in query_lower for word in ['recommandation', 'conseil', 'suggestion']):
@@ -231,7 +288,7 @@ class CoTChatInterface:
         
         elif any(word in query_lower for word in ['stock', 'inventaire', 'disponibilité']):
             if df is not None:
-                stock_rate = (df['disponibilite'] == 'En stock').mean()
+                stock_rate = aggs['stock_rate']
                 response = f"""
                 🧠 **Analyse CoT - Inventaire:**
                 
@@ -303,6 +360,8 @@ def main():
             df = st.session_state.chat_interface.process_file_upload(uploaded_file)
             if df is not None:
                 st.session_state.data = df
+                # Agrégats calculés une fois par upload, réutilisés par le chat
+                st.session_state.aggs = CoTChatInterface.compute_aggregates(df)
                 st.success(f"✅ {len(df)} produits chargés")
         
         # Options d'analyse
@@ -378,7 +437,7 @@ def main():
                 df = st.session_state.data
                 
                 # Distribution des prix
-                fig = px.histogram(df, x='prix', nbins=10, title="Distribution Prix")
+                fig = _price_histogram(df, 10, "Distribution Prix")
                 st.plotly_chart(fig, use_container_width=True, key="mini_price_dist")
                 
                 # Top vendeurs
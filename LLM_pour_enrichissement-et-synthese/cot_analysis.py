@@ -4,17 +4,37 @@ Utilisation d'une approche de raisonnement structuré pour générer des insight
 et recommandations basés sur les produits Top-K avec explicitation du processus
 """
 
+import io
+import os
 import pandas as pd
 import numpy as np
-from transformers import pipeline
 import json
+from string import Template
 from datetime import datetime
 from typing import Dict, List, Tuple, Any
-import tensorflow as tf
-tf.get_logger().setLevel('ERROR')
 import warnings
 warnings.filterwarnings('ignore')
 
+# L'import de transformers déclenche l'auto-détection des frameworks (~1s);
+# il est différé dans la propriété text_generator et gardé par ce drapeau:
+# le chemin purement analytique (pandas/NumPy) ne paie aucun coût LLM
+ENABLE_LLM = os.getenv('COT_ENABLE_LLM', '0') == '1'
+
+# Fenêtre d'historique en mémoire: la trace JSONL sur disque conserve tout,
+# reasoning_history ne garde que les dernières étapes
+_MAX_HISTORY_ENTRIES = 200
+
+# Sérialiseur de trace: orjson (C, UTF-8 natif) s'il est installé, sinon le
+# json standard en mode compact — même format JSONL dans les deux cas
+try:
+    import orjson
+
+    def _json_line(obj: Any) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+except ImportError:
+    def _json_line(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
 class ChainOfThoughtAnalyzer:
     """
     Analyseur utilisant Chain of Thought (CoT) pour un raisonnement explicite
@@ -22,66 +42,132 @@ class ChainOfThoughtAnalyzer:
     """
     
     def __init__(self):
-        """Initialise l'analyseur avec les pipelines et templates CoT"""
+        """Initialise l'analyseur avec les templates CoT (pipeline chargé à la demande)"""
         print("🧠 Initialisation de l'analyseur Chain of Thought...")
-        
-        # Pipeline de génération optimisé pour le raisonnement
-        self.text_generator = pipeline(
-            "text-generation",
-            model="microsoft/DialoGPT-medium",
-            tokenizer="microsoft/DialoGPT-medium",
-            max_length=400,
-            do_sample=True,
-            temperature=0.3,  # Plus conservateur pour la cohérence
-            top_p=0.9
-        )
-        
-        # Templates de raisonnement structuré
+
+        # Pipeline de génération chargé paresseusement: l'analyse actuelle est
+        # purement pandas et ne doit pas payer le téléchargement/chargement du modèle
+        self._text_generator = None
+
+        # Templates de raisonnement structuré, pré-compilés en string.Template:
+        # la tokenisation du gabarit est faite une fois à l'init et le
+        # remplissage répété se réduit à une substitution de dictionnaire
         self.cot_templates = {
-            'analysis': self._get_analysis_template(),
-            'recommendation': self._get_recommendation_template(),
-            'validation': self._get_validation_template()
+            'analysis': Template(self._get_analysis_template()),
+            'recommendation': Template(self._get_recommendation_template()),
+            'validation': Template(self._get_validation_template())
         }
-        
+
         print("✅ Analyseur Chain of Thought initialisé!")
+
+    @property
+    def text_generator(self):
+        """Pipeline de génération, instancié au premier accès seulement"""
+        if self._text_generator is None:
+            if not ENABLE_LLM:
+                raise RuntimeError(
+                    "Génération LLM désactivée: définir COT_ENABLE_LLM=1 pour l'activer"
+                )
+            from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+            import torch
+            # Petit modèle instruct chargé en bfloat16: mieux adapté au
+            # remplissage structuré des templates CoT que DialoGPT-medium
+            # (conversationnel, fp32), pour moitié moins de bande passante
+            # mémoire par poids et une empreinte bien plus faible
+            model_name = os.getenv('COT_LLM_MODEL', 'Qwen/Qwen2.5-0.5B-Instruct')
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model = AutoModelForCausalLM.from_pretrained(
+                model_name, torch_dtype=torch.bfloat16, device_map='auto'
+            )
+            generator = pipeline(
+                "text-generation",
+                model=model,
+                tokenizer=tokenizer,
+                framework='pt',  # évite l'auto-détection (et l'import) de TensorFlow
+                max_length=400,
+                do_sample=True,
+                temperature=0.3,  # Plus conservateur pour la cohérence
+                top_p=0.9
+            )
+            try:
+                # torch.compile s'applique au modèle sous-jacent, pas à la
+                # pipeline; un appel factice déclenche la compilation pour que
+                # le premier vrai prompt soit déjà rapide
+                generator.model = torch.compile(
+                    generator.model, mode='reduce-overhead', fullgraph=False
+                )
+                generator("warmup", max_new_tokens=1)
+            except Exception:
+                # Compilation indisponible (vieux torch, backend absent): mode eager
+                pass
+            self._text_generator = generator
+        return self._text_generator
     
+    def generate_batch(self, prompts: List[str], max_new_tokens: int = 150) -> List[str]:
+        """
+        Génère les complétions de plusieurs prompts en un seul appel batché.
+
+        À utiliser pour remplir les templates CoT par le LLM: un appel unique
+        avec batch_size amortit le coût de lancement par prompt, et
+        max_new_tokens évite de compter les tokens du prompt dans la limite
+        (contrairement à max_length).
+        """
+        if not prompts:
+            return []
+        import torch
+        # inference_mode coupe le suivi autograd (version counters, vues)
+        # inutile en génération pure
+        with torch.inference_mode():
+            outputs = self.text_generator(
+                list(prompts),
+                batch_size=len(prompts),
+                max_new_tokens=max_new_tokens
+            )
+        # La pipeline renvoie une liste de listes de candidats par prompt
+        return [out[0]['generated_text'] for out in outputs]
+
+    def fill_template(self, name: str, mapping: Dict) -> str:
+        """Remplit un template pré-compilé (substitution directe, sans re-parser
+        le gabarit à chaque appel comme le ferait str.format)"""
+        return self.cot_templates[name].safe_substitute(mapping)
+
     def _get_analysis_template(self) -> str:
         """Template pour l'analyse structurée"""
         return """
         ÉTAPE 1 - OBSERVATION DES DONNÉES:
-        {data_observation}
+        ${data_observation}
         
         ÉTAPE 2 - IDENTIFICATION DES PATTERNS:
-        {pattern_identification}
+        ${pattern_identification}
         
         ÉTAPE 3 - ANALYSE DES CORRÉLATIONS:
-        {correlation_analysis}
+        ${correlation_analysis}
         
         ÉTAPE 4 - ÉVALUATION DES IMPLICATIONS:
-        {implications_assessment}
+        ${implications_assessment}
         
         CONCLUSION ANALYTIQUE:
-        {analytical_conclusion}
+        ${analytical_conclusion}
         """
     
     def _get_recommendation_template(self) -> str:
         """Template pour les recommandations structurées"""
         return """
         CONTEXTE BUSINESS:
-        {business_context}
+        ${business_context}
         
         RAISONNEMENT ÉTAPE PAR ÉTAPE:
-        1. Problème identifié: {problem_statement}
-        2. Options considérées: {options_considered}
-        3. Critères d'évaluation: {evaluation_criteria}
-        4. Analyse des options: {options_analysis}
-        5. Sélection justifiée: {selected_option}
+        1. Problème identifié: ${problem_statement}
+        2. Options considérées: ${options_considered}
+        3. Critères d'évaluation: ${evaluation_criteria}
+        4. Analyse des options: ${options_analysis}
+        5. Sélection justifiée: ${selected_option}
         
         RECOMMANDATION FINALE:
-        {final_recommendation}
+        ${final_recommendation}
         
         PLAN D'ACTION:
-        {action_plan}
+        ${action_plan}
         """
     
     def _get_validation_template(self) -> str:
@@ -90,16 +176,16 @@ class ChainOfThoughtAnalyzer:
         VALIDATION DU RAISONNEMENT:
         
         Hypothèses vérifiées:
-        {verified_assumptions}
+        ${verified_assumptions}
         
         Cohérence logique:
-        {logical_consistency}
+        ${logical_consistency}
         
         Robustesse des conclusions:
-        {conclusion_robustness}
+        ${conclusion_robustness}
         
         Limites identifiées:
-        {identified_limitations}
+        ${identified_limitations}
         """
 
 class ProductInsightsCoTGenerator:
@@ -112,7 +198,30 @@ class ProductInsightsCoTGenerator:
         print("🚀 Initialisation du générateur d'insights CoT...")
         self.cot_analyzer = ChainOfThoughtAnalyzer()
         self.reasoning_history = []  # Historique des raisonnements
+        # Trace streamée en JSONL au fil de l'eau: la mémoire ne dépend pas
+        # du nombre d'analyses et l'export final n'a rien à re-sérialiser
+        self._open_trace()
         print("✅ Générateur d'insights CoT prêt!")
+
+    def _open_trace(self) -> None:
+        """Ouvre un nouveau fichier de trace horodaté"""
+        self._trace_path = f"cot_reasoning_trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        self._trace_file = open(self._trace_path, 'a', encoding='utf-8')
+        self._trace_steps = 0  # total streamé, indépendant de la fenêtre mémoire
+
+    def _record_reasoning(self, entry: Dict) -> None:
+        """Enregistre une étape de raisonnement et la streame dans la trace JSONL"""
+        if self._trace_file is None:
+            # Trace précédente clôturée par un export: on repart sur un
+            # nouveau fichier plutôt que d'écrire dans un flux fermé
+            self._open_trace()
+        self.reasoning_history.append(entry)
+        # Fenêtre glissante: le fichier garde la trace intégrale, la mémoire
+        # ne retient que les dernières entrées
+        del self.reasoning_history[:-_MAX_HISTORY_ENTRIES]
+        self._trace_steps += 1
+        self._trace_file.write(_json_line(entry) + '\n')
+        self._trace_file.flush()
     
     def load_and_validate_data(self, csv_path: str) -> Tuple[pd.DataFrame, Dict]:
         """
@@ -134,13 +243,24 @@ class ProductInsightsCoTGenerator:
             'conclusion': ""
         }
         
+        required_columns = ['titre', 'prix', 'note_moyenne', 'vendeur', 'disponibilite', 'score_global']
+
         try:
-            # Chargement des données
-            df = pd.read_csv(csv_path, sep=';')
+            # Chargement des données: parser Arrow multi-thread, projection sur
+            # les colonnes utilisées et dtypes explicites (category pour les
+            # colonnes chaînes à faible cardinalité)
+            try:
+                df = pd.read_csv(
+                    csv_path, sep=';', engine='pyarrow', usecols=required_columns,
+                    dtype={'prix': 'float32', 'note_moyenne': 'float32', 'score_global': 'float32',
+                           'vendeur': 'category', 'disponibilite': 'category'}
+                )
+            except (ImportError, ValueError):
+                # Repli: parser C sans projection (la validation signale les colonnes manquantes)
+                df = pd.read_csv(csv_path, sep=';')
             reasoning['step_1_loading'] += f" - Succès: {len(df)} lignes chargées"
-            
+
             # Validation de la structure - utilisation des colonnes réelles
-            required_columns = ['titre', 'prix', 'note_moyenne', 'vendeur', 'disponibilite', 'score_global']
             missing_cols = [col for col in required_columns if col not in df.columns]
             
             if missing_cols:
@@ -150,17 +270,25 @@ class ProductInsightsCoTGenerator:
             
             reasoning['step_2_validation'] += " - Structure validée: toutes les colonnes requises présentes"
             
-            # Vérification de la qualité
-            null_counts = df.isnull().sum()
-            reasoning['step_3_quality_check'] += f" - Valeurs manquantes détectées: {null_counts.sum()}"
-            
-            if null_counts.sum() > len(df) * 0.1:  # Plus de 10% de valeurs manquantes
+            # Vérification de la qualité: un seul passage sur le buffer booléen
+            # des colonnes utiles, sans réduction par colonne intermédiaire
+            total_nulls = int(np.count_nonzero(df[required_columns].isna().to_numpy()))
+            reasoning['step_3_quality_check'] += f" - Valeurs manquantes détectées: {total_nulls}"
+
+            if total_nulls > len(df) * 0.1:  # Plus de 10% de valeurs manquantes
                 reasoning['step_3_quality_check'] += " - ALERTE: Taux élevé de valeurs manquantes"
             
+            # Dtype category sur les colonnes chaînes à faible cardinalité
+            # (no-op si le chemin Arrow l'a déjà fait): les groupby,
+            # value_counts et masques d'égalité comparent alors des codes
+            # entiers au lieu de chaînes Python
+            for col in ('vendeur', 'disponibilite'):
+                df[col] = df[col].astype('category')
+
             reasoning['conclusion'] = f"SUCCÈS: Données validées - {len(df)} produits analysables"
-            
+
             # Sauvegarde du raisonnement
-            self.reasoning_history.append({
+            self._record_reasoning({
                 'timestamp': datetime.now().isoformat(),
                 'operation': 'data_loading',
                 'reasoning': reasoning
@@ -183,119 +311,175 @@ class ProductInsightsCoTGenerator:
             Dict: Analyse complète avec raisonnement CoT
         """
         print("🔍 Analyse des patterns avec Chain of Thought...")
-        
+
+        # Statistiques partagées calculées une seule fois: chaque étape lisait
+        # auparavant ses propres describe/quantile/value_counts sur df
+        stats = self._precompute_stats(df)
+
         # Structure du raisonnement CoT
         cot_analysis = {
-            'data_observation': self._observe_data_characteristics(df),
-            'pattern_identification': self._identify_patterns(df),
-            'correlation_analysis': self._analyze_correlations(df),
-            'implications_assessment': self._assess_implications(df),
+            'data_observation': self._observe_data_characteristics(df, stats),
+            'pattern_identification': self._identify_patterns(df, stats),
+            'correlation_analysis': self._analyze_correlations(df, stats),
+            'implications_assessment': self._assess_implications(df, stats),
             'analytical_conclusion': ""
         }
         
         # Synthèse des observations
         cot_analysis['analytical_conclusion'] = self._synthesize_analysis(cot_analysis)
-        
+
         # Sauvegarde du raisonnement
-        self.reasoning_history.append({
+        self._record_reasoning({
             'timestamp': datetime.now().isoformat(),
             'operation': 'pattern_analysis',
-            'reasoning': cot_analysis
+            'reasoning': dict(cot_analysis)
         })
-        
+
+        # Cache numérique transmis aux recommandations (exclu de l'historique
+        # car non sérialisable en JSON)
+        cot_analysis['_cache'] = stats
+
         return cot_analysis
     
-    def _observe_data_characteristics(self, df: pd.DataFrame) -> str:
+    def _precompute_stats(self, df: pd.DataFrame) -> Dict:
+        """Calcule une seule fois les statistiques partagées par les étapes CoT"""
+        # Colonnes numériques extraites une fois en tableaux NumPy: les
+        # réductions np.* évitent le surcoût de dispatch pandas par appel
+        prix_arr = df['prix'].to_numpy(dtype=np.float32)
+        score_arr = df['score_global'].to_numpy(dtype=np.float32)
+        # Toutes les réductions scalaires en un seul agg (une passe fusionnée
+        # par colonne) au lieu d'un appel NumPy par statistique
+        num = df[['prix', 'score_global']].agg(['mean', 'std', 'median', 'min', 'max']).to_numpy()
+        score_q75, score_q80 = np.quantile(score_arr, [0.75, 0.8])
+        high_perf_mask = score_arr > score_q75
+        star_mask = score_arr > score_q80
+        # Un seul passage hash-aggregate sur la clé vendeur au lieu de deux
+        # groupby séparés plus un value_counts
+        vendor_agg = df.groupby('vendeur', observed=True).agg(
+            score_mean=('score_global', 'mean'),
+            price_mean=('prix', 'mean'),
+            count=('titre', 'count')
+        )
+        return {
+            'prix_arr': prix_arr,
+            'score_arr': score_arr,
+            'high_perf_mask': high_perf_mask,
+            'star_mask': star_mask,
+            'avg_price_high': float(prix_arr[high_perf_mask].mean()) if high_perf_mask.any() else float('nan'),
+            'prix_mean': float(num[0, 0]),
+            'prix_std': float(num[1, 0]),
+            'prix_median': float(num[2, 0]),
+            'prix_min': float(num[3, 0]),
+            'prix_max': float(num[4, 0]),
+            'score_mean': float(num[0, 1]),
+            'score_std': float(num[1, 1]),
+            'score_q75': float(score_q75),
+            'score_q80': float(score_q80),
+            'vendor_agg': vendor_agg,
+            'vendor_counts': vendor_agg['count'].sort_values(ascending=False),
+            'dispo_counts': df['disponibilite'].value_counts(),
+            'vendor_score_mean': vendor_agg['score_mean'],
+            'vendor_price_mean': vendor_agg['price_mean'],
+        }
+
+    def _observe_data_characteristics(self, df: pd.DataFrame, stats: Dict) -> str:
         """Étape 1: Observation des caractéristiques des données"""
         observations = []
-        
+
         # Distribution des prix
-        price_stats = df['prix'].describe()
-        observations.append(f"Prix: médiane {price_stats['50%']:.0f}€, écart-type {price_stats['std']:.0f}€")
-        
+        observations.append(f"Prix: médiane {stats['prix_median']:.0f}€, écart-type {stats['prix_std']:.0f}€")
+
         # Distribution des vendeurs (au lieu de catégories)
-        vendeur_counts = df['vendeur'].value_counts()
+        vendeur_counts = stats['vendor_counts']
         observations.append(f"Vendeurs: {len(vendeur_counts)} types, leader '{vendeur_counts.index[0]}' ({vendeur_counts.iloc[0]} produits)")
-        
+
         # Distribution des scores
-        score_stats = df['score_global'].describe()
-        observations.append(f"Scores: moyenne {score_stats['mean']:.3f}, écart-type {score_stats['std']:.3f}")
-        
-        # Disponibilité
-        dispo_counts = df['disponibilite'].value_counts()
-        observations.append(f"Disponibilité: {dispo_counts.to_dict()}")
-        
+        observations.append(f"Scores: moyenne {stats['score_mean']:.3f}, écart-type {stats['score_std']:.3f}")
+
+        # Disponibilité (itération directe index/values, sans dict intermédiaire)
+        dispo_counts = stats['dispo_counts']
+        dispo_txt = ", ".join(
+            f"{k}: {v}" for k, v in zip(dispo_counts.index, dispo_counts.values)
+        )
+        observations.append(f"Disponibilité: {dispo_txt}")
+
         return " | ".join(observations)
-    
-    def _identify_patterns(self, df: pd.DataFrame) -> str:
+
+    def _identify_patterns(self, df: pd.DataFrame, stats: Dict) -> str:
         """Étape 2: Identification des patterns significatifs"""
         patterns = []
-        
+
         # Pattern prix-vendeur (au lieu de catégorie)
-        price_by_vendeur = df.groupby('vendeur')['prix'].mean().sort_values(ascending=False)
-        patterns.append(f"Prix par vendeur: {price_by_vendeur.head(3).to_dict()}")
-        
-        # Pattern score-prix
-        high_score_products = df[df['score_global'] > df['score_global'].quantile(0.75)]
-        avg_price_high_score = high_score_products['prix'].mean()
-        avg_price_total = df['prix'].mean()
-        
+        price_by_vendeur = stats['vendor_price_mean'].sort_values(ascending=False)
+        top3_txt = ", ".join(
+            f"{k}: {v:.0f}€"
+            for k, v in zip(price_by_vendeur.index[:3], price_by_vendeur.values[:3])
+        )
+        patterns.append(f"Prix par vendeur: {top3_txt}")
+
+        # Pattern score-prix (masque NumPy, pas de sous-DataFrame intermédiaire)
+        avg_price_high_score = stats['avg_price_high']
+        avg_price_total = stats['prix_mean']
+
         if avg_price_high_score > avg_price_total * 1.2:
             patterns.append("PATTERN: Produits haute performance = prix premium")
         elif avg_price_high_score < avg_price_total * 0.8:
             patterns.append("PATTERN: Produits haute performance = bon rapport qualité-prix")
         else:
             patterns.append("PATTERN: Performance indépendante du prix")
-        
+
         # Pattern concentration
-        top_vendeur_ratio = df['vendeur'].value_counts().iloc[0] / len(df)
+        top_vendeur_ratio = stats['vendor_counts'].iloc[0] / len(df)
         if top_vendeur_ratio > 0.5:
             patterns.append(f"PATTERN: Forte concentration ({top_vendeur_ratio:.1%}) chez un vendeur")
-        
+
         return " | ".join(patterns)
-    
-    def _analyze_correlations(self, df: pd.DataFrame) -> str:
+
+    def _analyze_correlations(self, df: pd.DataFrame, stats: Dict) -> str:
         """Étape 3: Analyse des corrélations"""
         correlations = []
-        
-        # Corrélation prix-score
-        prix_score_corr = df['prix'].corr(df['score_global'])
+
+        # Corrélation prix-score (sur les tableaux NumPy préchargés)
+        prix_score_corr = float(np.corrcoef(stats['prix_arr'], stats['score_arr'])[0, 1])
         if abs(prix_score_corr) > 0.3:
             direction = "positive" if prix_score_corr > 0 else "négative"
             correlations.append(f"Corrélation {direction} prix-score: {prix_score_corr:.3f}")
-        
-        # Analyse par disponibilité
-        if 'En stock' in df['disponibilite'].values:
-            en_stock_df = df[df['disponibilite'] == 'En stock']
-            if len(en_stock_df) > 0:
-                score_diff = en_stock_df['score_global'].mean() - df['score_global'].mean()
+
+        # Analyse par disponibilité: le test d'appartenance se fait sur la
+        # table des catégories (quelques entrées) plutôt que sur les N valeurs
+        if 'En stock' in df['disponibilite'].cat.categories:
+            # Masque booléen appliqué directement au tableau de scores: pas de
+            # sous-DataFrame matérialisé juste pour une moyenne
+            en_stock_mask = (df['disponibilite'] == 'En stock').to_numpy()
+            if en_stock_mask.any():
+                score_diff = float(stats['score_arr'][en_stock_mask].mean()) - stats['score_mean']
                 if abs(score_diff) > 0.01:
                     correlations.append(f"Produits en stock: score {'supérieur' if score_diff > 0 else 'inférieur'} de {abs(score_diff):.3f}")
-        
+
         return " | ".join(correlations) if correlations else "Aucune corrélation significative détectée"
-    
-    def _assess_implications(self, df: pd.DataFrame) -> str:
+
+    def _assess_implications(self, df: pd.DataFrame, stats: Dict) -> str:
         """Étape 4: Évaluation des implications business"""
         implications = []
-        
+
         # Implications pricing
-        price_range = df['prix'].max() - df['prix'].min()
-        if price_range > df['prix'].mean() * 2:
+        price_range = stats['prix_max'] - stats['prix_min']
+        if price_range > stats['prix_mean'] * 2:
             implications.append("IMPLICATION: Stratégie multi-segments nécessaire")
-        
+
         # Implications vendeurs (au lieu de catégories)
-        vendeur_performance = df.groupby('vendeur')['score_global'].mean()
+        vendeur_performance = stats['vendor_score_mean']
         best_vendeur = vendeur_performance.idxmax()
         worst_vendeur = vendeur_performance.idxmin()
-        
+
         if vendeur_performance[best_vendeur] - vendeur_performance[worst_vendeur] > 0.05:
             implications.append(f"IMPLICATION: Optimiser {worst_vendeur}, renforcer {best_vendeur}")
-        
+
         # Implications stock
-        stock_issues = df[df['disponibilite'] != 'En stock']
-        if len(stock_issues) > len(df) * 0.2:
+        n_en_stock = stats['dispo_counts'].get('En stock', 0)
+        if len(df) - n_en_stock > len(df) * 0.2:
             implications.append("IMPLICATION: Problèmes de disponibilité à adresser")
-        
+
         return " | ".join(implications) if implications else "Aucune implication critique identifiée"
     
     def _synthesize_analysis(self, cot_analysis: Dict) -> str:
@@ -326,32 +510,34 @@ class ProductInsightsCoTGenerator:
             Dict: Recommandations avec raisonnement explicite
         """
         print("💡 Génération de recommandations avec Chain of Thought...")
-        
+
+        # Réutilise les statistiques calculées par l'analyse des patterns
+        cache = analysis.get('_cache') or self._precompute_stats(df)
+
         recommendations = {}
-        
+
         # Recommandation pricing avec CoT
-        recommendations['pricing'] = self._generate_pricing_recommendation_cot(df)
-        
+        recommendations['pricing'] = self._generate_pricing_recommendation_cot(df, cache)
+
         # Recommandation vendeurs avec CoT (au lieu de catégories)
-        recommendations['vendor'] = self._generate_vendor_recommendation_cot(df)
-        
+        recommendations['vendor'] = self._generate_vendor_recommendation_cot(df, cache)
+
         # Recommandation inventaire avec CoT
-        recommendations['inventory'] = self._generate_inventory_recommendation_cot(df)
-        
+        recommendations['inventory'] = self._generate_inventory_recommendation_cot(df, cache)
+
         # Recommandation marketing avec CoT
-        recommendations['marketing'] = self._generate_marketing_recommendation_cot(df, analysis)
-        
+        recommendations['marketing'] = self._generate_marketing_recommendation_cot(df, analysis, cache)
+
         return recommendations
     
-    def _generate_pricing_recommendation_cot(self, df: pd.DataFrame) -> Dict:
+    def _generate_pricing_recommendation_cot(self, df: pd.DataFrame, cache: Dict) -> Dict:
         """Recommandation pricing avec raisonnement CoT"""
-        
+
         # Contexte business
-        context = f"Analyse de {len(df)} produits avec prix moyen {df['prix'].mean():.0f}€"
-        
+        context = f"Analyse de {len(df)} produits avec prix moyen {cache['prix_mean']:.0f}€"
+
         # Problème identifié
-        price_std = df['prix'].std()
-        cv_price = price_std / df['prix'].mean()  # Coefficient de variation
+        cv_price = cache['prix_std'] / cache['prix_mean']  # Coefficient de variation
         
         if cv_price > 0.5:
             problem = "Forte hétérogénéité des prix nécessitant une stratégie segmentée"
@@ -368,10 +554,9 @@ class ProductInsightsCoTGenerator:
         # Critères d'évaluation
         criteria = ["Cohérence portefeuille", "Maximisation marge", "Positionnement concurrentiel"]
         
-        # Analyse des options
-        high_performers = df[df['score_global'] > df['score_global'].quantile(0.75)]
-        avg_price_high = high_performers['prix'].mean()
-        avg_price_total = df['prix'].mean()
+        # Analyse des options (réductions déjà calculées dans le cache)
+        avg_price_high = cache['avg_price_high']
+        avg_price_total = cache['prix_mean']
         
         if avg_price_high > avg_price_total * 1.2:
             analysis = "Les produits performants justifient un pricing premium"
@@ -402,20 +587,15 @@ class ProductInsightsCoTGenerator:
             'action_plan': action_plan
         }
     
-    def _generate_vendor_recommendation_cot(self, df: pd.DataFrame) -> Dict:
+    def _generate_vendor_recommendation_cot(self, df: pd.DataFrame, cache: Dict) -> Dict:
         """Recommandation vendeurs avec raisonnement CoT"""
-        
-        # Calcul des performances par vendeur avec les bonnes colonnes
-        vendor_performance = df.groupby('vendeur').agg({
-            'score_global': 'mean',
-            'prix': 'mean',
-            'titre': 'count'  # Utiliser 'titre' au lieu de 'nom'
-        }).round(3)
-        
-        best_vendor = vendor_performance['score_global'].idxmax()
-        worst_vendor = vendor_performance['score_global'].idxmin()
-        
-        context = f"Analyse de {len(vendor_performance)} vendeurs"
+
+        # Performances par vendeur déjà agrégées dans le cache
+        vendor_scores = cache['vendor_score_mean']
+        best_vendor = vendor_scores.idxmax()
+        worst_vendor = vendor_scores.idxmin()
+
+        context = f"Analyse de {len(vendor_scores)} vendeurs"
         problem = f"Performance inégale: {best_vendor} domine, {worst_vendor} sous-performe"
         
         options = [
@@ -425,7 +605,7 @@ class ProductInsightsCoTGenerator:
         ]
         
         # Sélection basée sur la concentration
-        leader_count = vendor_performance.loc[best_vendor, 'titre']
+        leader_count = cache['vendor_counts'].get(best_vendor, 0)
         total_products = len(df)
         concentration = leader_count / total_products
         
@@ -452,10 +632,10 @@ class ProductInsightsCoTGenerator:
             ]
         }
     
-    def _generate_inventory_recommendation_cot(self, df: pd.DataFrame) -> Dict:
+    def _generate_inventory_recommendation_cot(self, df: pd.DataFrame, cache: Dict) -> Dict:
         """Recommandation inventaire avec raisonnement CoT"""
-        
-        dispo_analysis = df['disponibilite'].value_counts()
+
+        dispo_analysis = cache['dispo_counts']
         stock_rate = dispo_analysis.get('En stock', 0) / len(df) if 'En stock' in dispo_analysis else 0
         
         context = f"Taux de disponibilité: {stock_rate:.1%}"
@@ -483,13 +663,14 @@ class ProductInsightsCoTGenerator:
             ]
         }
     
-    def _generate_marketing_recommendation_cot(self, df: pd.DataFrame, analysis: Dict) -> Dict:
+    def _generate_marketing_recommendation_cot(self, df: pd.DataFrame, analysis: Dict, cache: Dict) -> Dict:
         """Recommandation marketing avec raisonnement CoT"""
-        
-        high_performers = df[df['score_global'] > df['score_global'].quantile(0.8)]
-        star_vendors = high_performers['vendeur'].value_counts()  # Utiliser 'vendeur' au lieu de 'categorie'
-        
-        context = f"{len(high_performers)} produits stars identifiés"
+
+        star_mask = cache['star_mask']
+        star_vendors = df['vendeur'][star_mask].value_counts()  # Utiliser 'vendeur' au lieu de 'categorie'
+        star_vendors = star_vendors[star_vendors > 0]
+
+        context = f"{int(star_mask.sum())} produits stars identifiés"
         problem = "Optimiser l'allocation du budget marketing pour maximiser le ROI"
         
         if len(star_vendors) == 1:
@@ -527,67 +708,70 @@ class ProductInsightsCoTGenerator:
         Returns:
             str: Résumé exécutif avec raisonnement explicite
         """
-        
-        summary = f"""
+
+        # Statistiques déjà calculées pendant l'analyse: pas de nouveau scan de df
+        stats = analysis.get('_cache') or self._precompute_stats(df)
+
+        buf = io.StringIO()
+        buf.write(f"""
         🧠 RÉSUMÉ EXÉCUTIF - ANALYSE CHAIN OF THOUGHT
-        
+
         📊 MÉTHODOLOGIE DE RAISONNEMENT
         L'analyse suit une approche Chain of Thought structurée en 4 étapes:
         1️⃣ Observation des caractéristiques des données
-        2️⃣ Identification des patterns significatifs  
+        2️⃣ Identification des patterns significatifs
         3️⃣ Analyse des corrélations et dépendances
         4️⃣ Évaluation des implications business
-        
+
         📈 INSIGHTS GÉNÉRÉS PAR LE RAISONNEMENT CoT
-        
+
         🔍 OBSERVATIONS FACTUELLES:
         • {len(df)} produits analysés
-        • Prix médian: {df['prix'].median():.0f}€ (écart-type: {df['prix'].std():.0f}€)
-        • Score moyen: {df['score_global'].mean():.3f}
-        • {len(df['vendeur'].unique())} vendeurs représentés
-        
+        • Prix médian: {stats['prix_median']:.0f}€ (écart-type: {stats['prix_std']:.0f}€)
+        • Score moyen: {stats['score_mean']:.3f}
+        • {len(stats['vendor_counts'])} vendeurs représentés
+
         🎯 PATTERNS IDENTIFIÉS:
         {analysis.get('pattern_identification', 'Non disponible')}
-        
+
         🔗 CORRÉLATIONS DÉCOUVERTES:
         {analysis.get('correlation_analysis', 'Non disponible')}
-        
+
         ⚡ IMPLICATIONS STRATÉGIQUES:
         {analysis.get('implications_assessment', 'Non disponible')}
-        
+
         💡 RECOMMANDATIONS BASÉES SUR LE RAISONNEMENT CoT
-        
-        🎯 PRICING ({recommendations['pricing']['selected_option']}):
-        Raisonnement: {recommendations['pricing']['options_analysis']}
-        → Action: {recommendations['pricing']['final_recommendation']}
-        
-        📂 VENDEURS ({recommendations['vendor']['selected_option']}):
-        Raisonnement: {recommendations['vendor']['options_analysis']}
-        → Action: {recommendations['vendor']['final_recommendation']}
-        
-        📦 INVENTAIRE ({recommendations['inventory']['selected_option']}):
-        Raisonnement: {recommendations['inventory']['options_analysis']}
-        → Action: {recommendations['inventory']['final_recommendation']}
-        
-        📢 MARKETING ({recommendations['marketing']['selected_option']}):
-        Raisonnement: {recommendations['marketing']['options_analysis']}
-        → Action: {recommendations['marketing']['final_recommendation']}
-        
+        """)
+
+        for emoji, label, key in (
+            ("🎯", "PRICING", 'pricing'),
+            ("📂", "VENDEURS", 'vendor'),
+            ("📦", "INVENTAIRE", 'inventory'),
+            ("📢", "MARKETING", 'marketing'),
+        ):
+            rec = recommendations[key]
+            buf.write(f"""
+        {emoji} {label} ({rec['selected_option']}):
+        Raisonnement: {rec['options_analysis']}
+        → Action: {rec['final_recommendation']}
+        """)
+
+        buf.write(f"""
         🎯 CONCLUSION DU RAISONNEMENT
         {analysis.get('analytical_conclusion', 'Non disponible')}
-        
+
         ⚡ PLAN D'ACTION PRIORITAIRE
         1. Mise en œuvre des recommandations pricing (Impact: Élevé)
         2. Rééquilibrage du portefeuille vendeurs (Impact: Moyen)
         3. Optimisation de la gestion d'inventaire (Impact: Élevé)
         4. Réallocation du budget marketing (Impact: Moyen)
-        
+
         📋 TRAÇABILITÉ DU RAISONNEMENT
         Toutes les étapes de raisonnement sont documentées et vérifiables.
         Historique complet disponible dans l'attribut reasoning_history.
-        """
-        
-        return summary
+        """)
+
+        return buf.getvalue()
     
     def export_reasoning_trace(self, filepath: str = None) -> str:
         """
@@ -599,24 +783,33 @@ class ProductInsightsCoTGenerator:
         Returns:
             str: Chemin du fichier exporté
         """
-        if filepath is None:
-            filepath = f"cot_reasoning_trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
-        reasoning_export = {
+        # Les étapes ont déjà été streamées ligne par ligne; il ne reste qu'à
+        # écrire la ligne de métadonnées, fermer le flux et renommer au besoin
+        metadata = {
             'metadata': {
                 'export_timestamp': datetime.now().isoformat(),
-                'total_reasoning_steps': len(self.reasoning_history),
+                'total_reasoning_steps': self._trace_steps,
                 'methodology': 'Chain of Thought (CoT) Reasoning'
             },
-            'reasoning_history': self.reasoning_history,
-            'templates_used': self.cot_analyzer.cot_templates
+            'templates_used': {name: tpl.template for name, tpl in self.cot_analyzer.cot_templates.items()}
         }
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(reasoning_export, f, indent=2, ensure_ascii=False)
-        
-        print(f"📋 Trace de raisonnement exportée vers: {filepath}")
-        return filepath
+        if self._trace_file is None:
+            # Export répété sans nouvelle étape: trace fraîche, métadonnées seules
+            self._open_trace()
+        self._trace_file.write(_json_line(metadata) + '\n')
+        self._trace_file.close()
+
+        exported = self._trace_path
+        if filepath is not None and filepath != exported:
+            os.replace(exported, filepath)
+            exported = filepath
+
+        # L'export clôt le flux courant; le prochain _record_reasoning
+        # rouvrira une trace fraîche au lieu d'écrire dans un flux fermé
+        self._trace_file = None
+
+        print(f"📋 Trace de raisonnement exportée vers: {exported}")
+        return exported
     
     def run_complete_cot_analysis(self, csv_path: str) -> Dict:
         """
@@ -7,8 +7,13 @@ et sélection des top-5 produits via un modèle RandomForest, plus une interface
 """
 
 import streamlit as st
+from array import array
+from dataclasses import dataclass
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
+import soupsieve
 import pandas as pd
 import time
 import random
@@ -21,11 +26,187 @@ from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
 from collections import Counter
-import base64
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
 import pickle
 import numpy as np
 from sklearn.preprocessing import StandardScaler
 
+# Motifs compilés une fois au chargement du module: le nettoyage de texte
+# tourne plusieurs fois par produit et évite ainsi la recherche dans le
+# cache de re à chaque appel
+
+# Taille maximale du journal conservé en session
+_MAX_LOG_LINES = 5000
+_WS_RE = re.compile(r'\s+')
+_PRICE_RE = re.compile(r'([\d,]+\.?\d*)')
+_TRANS = str.maketrans({';': ',', '\n': ' ', '\r': ' '})
+
+# Classes CSS star-rating -> note numérique (books.toscrape.com)
+_RATING_WORDS = {'One': '1', 'Two': '2', 'Three': '3', 'Four': '4', 'Five': '5'}
+
+# Disponibilité -> score: les codes catégoriels indexent cette table float32
+# de 4 entrées (gather vectorisé, pas de lookup dict Python par ligne)
+_DISPO_CATS = pd.CategoricalDtype(['Rupture', 'Inconnu', 'Stock limité', 'Disponible'])
+_DISPO_LUT = np.array([0.0, 0.5, 0.7, 1.0], dtype=np.float32)
+
+# Index inversé mot-clé -> intention du chat: une seule passe sur les tokens
+# de la requête remplace les quatre balayages any(...) successifs
+_INTENT_MAP = {
+    'prix': 'pricing', 'price': 'pricing', 'coût': 'pricing', 'coûts': 'pricing',
+    'tarif': 'pricing', 'tarifs': 'pricing',
+    'vendeur': 'vendor', 'vendeurs': 'vendor', 'fournisseur': 'vendor',
+    'fournisseurs': 'vendor', 'supplier': 'vendor',
+    'recommandation': 'recommendations', 'recommandations': 'recommendations',
+    'conseil': 'recommendations', 'conseils': 'recommendations',
+    'suggestion': 'recommendations', 'suggestions': 'recommendations',
+    'stock': 'inventory', 'stocks': 'inventory', 'inventaire': 'inventory',
+    'disponibilité': 'inventory',
+}
+_TOKEN_RE = re.compile(r'\w+')
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+def _build_features_numpy(prix, note, dispo, ventes):
+    """Assemble la matrice (prix, note, ventes, dispo) en une passe vectorisée"""
+    return np.column_stack([prix, note, ventes, dispo]).astype(np.float32)
+
+def _build_features_scaled_numpy(prix, note, dispo, ventes, mu, inv_sigma):
+    """Assemblage + standardisation fusionnés: la matrice sort déjà en
+    (x - mu) * inv_sigma, sans buffer intermédiaire non standardisé"""
+    X = np.column_stack([prix, note, ventes, dispo]).astype(np.float32)
+    X -= mu
+    X *= inv_sigma
+    return X
+
+if HAVE_NUMBA:
+    @njit(cache=True, parallel=True)
+    def _build_features(prix, note, dispo, ventes):
+        """Remplit la matrice de caractéristiques en une seule boucle JIT"""
+        n = prix.size
+        out = np.empty((n, 4), np.float32)
+        for i in prange(n):
+            out[i, 0] = prix[i]
+            out[i, 1] = note[i]
+            out[i, 2] = ventes[i]
+            out[i, 3] = dispo[i]
+        return out
+
+    @njit(cache=True, parallel=True)
+    def _build_features_scaled(prix, note, dispo, ventes, mu, inv_sigma):
+        """Assemblage + standardisation en une seule boucle JIT: chaque
+        élément n'est touché qu'une fois, écrit déjà standardisé (le
+        multiply par 1/sigma est nettement moins cher qu'une division)"""
+        n = prix.size
+        out = np.empty((n, 4), np.float32)
+        for i in prange(n):
+            out[i, 0] = (prix[i] - mu[0]) * inv_sigma[0]
+            out[i, 1] = (note[i] - mu[1]) * inv_sigma[1]
+            out[i, 2] = (ventes[i] - mu[2]) * inv_sigma[2]
+            out[i, 3] = (dispo[i] - mu[3]) * inv_sigma[3]
+        return out
+
+    # Échauffement à l'import: la compilation ne se paie pas sur la première
+    # requête utilisateur
+    _z = np.zeros(1, np.float32)
+    _s = np.ones(4, np.float32)
+    _build_features(_z, _z, _z, _z)
+    _build_features_scaled(_z, _z, _z, _z, _s, _s)
+else:
+    _build_features = _build_features_numpy
+    _build_features_scaled = _build_features_scaled_numpy
+
+# Décodage JSON des APIs produits: orjson (C, ~3x plus rapide sur les gros
+# tableaux comme /photos) s'il est installé, sinon le json standard
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+except ImportError:
+    def _json_loads(data):
+        return json.loads(data)
+
+# Schéma fixe des produits scrapés
+_PRODUCT_FIELDS = ('titre', 'prix', 'disponibilite', 'note_moyenne', 'description',
+                   'vendeur', 'categorie', 'lien_produit', 'source')
+
+def _products_dataframe(products):
+    """Construit le DataFrame des produits colonne par colonne.
+
+    pd.DataFrame(liste_de_dicts) sonde les clés de chaque dict ligne par
+    ligne et produit des colonnes object; une transposition explicite suivie
+    de np.asarray par colonne emprunte les chemins rapides de pandas et fixe
+    directement les dtypes numériques en float32.
+    """
+    if not products:
+        return pd.DataFrame()
+    # Colonnes numériques accumulées dans des array('f') compacts (4 octets
+    # par valeur, pas d'objet Python intermédiaire) puis exposées sans copie
+    # via np.frombuffer; seules les colonnes chaînes passent par des listes
+    prix_buf = array('f')
+    note_buf = array('f')
+    for p in products:
+        prix_buf.append(p.get('prix') or 0.0)
+        note_buf.append(p.get('note_moyenne') or 0.0)
+    cols = {field: [p.get(field) for p in products]
+            for field in _PRODUCT_FIELDS if field not in ('prix', 'note_moyenne')}
+    cols['prix'] = np.frombuffer(prix_buf, dtype=np.float32)
+    cols['note_moyenne'] = np.frombuffer(note_buf, dtype=np.float32)
+    df = pd.DataFrame(cols)[list(_PRODUCT_FIELDS)]
+    # Colonnes chaînes à faible cardinalité en category: les groupby,
+    # value_counts et comparaisons travaillent sur des codes entiers et la
+    # mémoire par ligne tombe d'un pointeur + str Python à un petit entier
+    for col in ('disponibilite', 'vendeur', 'categorie', 'source'):
+        df[col] = df[col].astype('category')
+    return df
+
+def _session_df():
+    """DataFrame des produits scrapés, matérialisé une fois par lot.
+
+    Streamlit ré-exécute tout le script à chaque interaction (onglet, chat,
+    slider) et chaque rerun reconstruisait le DataFrame jusqu'à six fois.
+    La copie en session n'est invalidée que quand le nombre de produits
+    change, donc une interaction sans nouveau scraping ne reconstruit rien.
+    """
+    products = st.session_state.scraped_products
+    if (st.session_state.get('products_df') is None
+            or st.session_state.get('products_df_n') != len(products)):
+        st.session_state.products_df = _products_dataframe(products)
+        st.session_state.products_df_n = len(products)
+    return st.session_state.products_df
+
+def _source_summary(df):
+    """Agrégats par source partagés entre tab2 et tab3, une seule passe.
+
+    Les deux onglets refaisaient quasiment le même groupby à chaque rerun;
+    le résultat est mémoïsé en session et invalidé avec le lot, comme
+    _session_df.
+    """
+    if (st.session_state.get('source_summary') is None
+            or st.session_state.get('source_summary_n') != len(df)):
+        st.session_state.source_summary = df.groupby('source', sort=False, observed=True).agg({
+            'titre': 'count',
+            'prix': 'mean',
+            'note_moyenne': 'mean',
+            'categorie': 'nunique'
+        }).round(2)
+        st.session_state.source_summary_n = len(df)
+    return st.session_state.source_summary
+
+def _category_summary(df):
+    """Comptes et notes moyennes par catégorie en un seul groupby mémoïsé"""
+    if (st.session_state.get('category_summary') is None
+            or st.session_state.get('category_summary_n') != len(df)):
+        st.session_state.category_summary = df.groupby('categorie', sort=False, observed=True).agg(
+            count=('titre', 'size'), mean_note=('note_moyenne', 'mean'))
+        st.session_state.category_summary_n = len(df)
+    return st.session_state.category_summary
+
 # Configuration de la page
 st.set_page_config(
     page_title="Scraper Multi-Catégories avec Chat CoT",
@@ -92,6 +273,26 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_data(show_spinner=False)
+def _run_cot(prix, score, vendeur_codes, vendeur_names, dispo_u8):
+    """Scans O(n) de l'analyse CoT simulée, cachés sur les tableaux étroits.
+
+    Streamlit relance tout le script à chaque interaction; hasher des
+    ndarrays compacts (codes entiers pour les vendeurs, pas les chaînes) est
+    bien plus rapide que hasher le DataFrame complet, et tant que les
+    colonnes sont identiques les réductions sont sautées.
+    """
+    counts = np.bincount(vendeur_codes[vendeur_codes >= 0], minlength=len(vendeur_names))
+    return {
+        'total_products': int(prix.size),
+        'avg_price': float(np.mean(prix)),
+        'median_score': float(np.median(score)),
+        'unique_vendors': int(np.count_nonzero(counts)),
+        'corr': float(np.corrcoef(prix, score)[0, 1]),
+        'top_vendor': vendeur_names[int(np.argmax(counts))] if len(vendeur_names) else None,
+        'stock_rate': float(dispo_u8.mean()),
+    }
+
 # Classe CoTChatInterface (adaptée pour utiliser les données scrapées)
 class CoTChatInterface:
     """Interface chat pour l'analyseur Chain of Thought"""
@@ -136,21 +337,80 @@ class CoTChatInterface:
         
         return df
     
+    @staticmethod
+    def vendor_aggregates(df):
+        """Une seule passe groupby vendeur partagée par tous les consommateurs.
+
+        simulate_cot_analysis, generate_visualizations et le chat faisaient
+        chacun leur propre value_counts/groupby O(n); l'agrégation fusionnée
+        (sort=False: pas de tri de la clé) et la corrélation prix-score sont
+        calculées une fois et mémorisées en session.
+        """
+        cached = st.session_state.get('vendor_aggs')
+        if cached is not None and cached[0] == len(df):
+            return cached[1], cached[2]
+        g = df.groupby('vendeur', sort=False, observed=True).agg(
+            count=('titre', 'size'),
+            mean_score=('score_global', 'mean'),
+            mean_price=('prix', 'mean'),
+        )
+        corr = float(np.corrcoef(df['prix'].to_numpy(), df['score_global'].to_numpy())[0, 1])
+        st.session_state.vendor_aggs = (len(df), g, corr)
+        return g, corr
+
+    @staticmethod
+    def dispo_bitmap(df):
+        """Bitmap uint8 de la disponibilité, calculée une fois par jeu de données.
+
+        Chaque df['disponibilite'] == 'Disponible' matérialisait une Series
+        booléenne avec comparaison de chaînes par ligne; les réductions sur ce
+        tableau uint8 (1 octet/ligne) tournent à la bande passante mémoire.
+        """
+        cached = st.session_state.get('dispo_u8')
+        if cached is not None and len(cached) == len(df):
+            return cached
+        ser = df['disponibilite']
+        if isinstance(ser.dtype, pd.CategoricalDtype):
+            # Colonne category: comparaison sur les codes entiers, sans
+            # rematérialiser les chaînes
+            if 'Disponible' in ser.cat.categories:
+                code = ser.cat.categories.get_loc('Disponible')
+                bitmap = (ser.cat.codes.to_numpy() == code).astype(np.uint8)
+            else:
+                bitmap = np.zeros(len(ser), dtype=np.uint8)
+        else:
+            bitmap = (ser.to_numpy() == 'Disponible').astype(np.uint8)
+        st.session_state.dispo_u8 = bitmap
+        return bitmap
+
     def simulate_cot_analysis(self, df):
         """Simulation de l'analyse CoT (à remplacer par le vrai code)"""
         with st.spinner("🔍 Analyse Chain of Thought en cours..."):
+            # Les scans passent par la fonction cachée sur tableaux étroits;
+            # les vendeurs voyagent en codes entiers + référentiel plutôt
+            # qu'en tableau object de chaînes
+            vend = df['vendeur']
+            if not isinstance(vend.dtype, pd.CategoricalDtype):
+                vend = vend.astype('category')
+            core = _run_cot(
+                df['prix'].to_numpy(dtype=np.float32),
+                df['score_global'].to_numpy(dtype=np.float32),
+                vend.cat.codes.to_numpy(),
+                tuple(vend.cat.categories),
+                self.dispo_bitmap(df),
+            )
             # Simulation des résultats
             analysis_results = {
                 'data_stats': {
-                    'total_products': len(df),
-                    'avg_price': df['prix'].mean(),
-                    'median_score': df['score_global'].median(),
-                    'unique_vendors': df['vendeur'].nunique()
+                    'total_products': core['total_products'],
+                    'avg_price': core['avg_price'],
+                    'median_score': core['median_score'],
+                    'unique_vendors': core['unique_vendors']
                 },
                 'patterns': {
-                    'price_performance_correlation': df['prix'].corr(df['score_global']),
-                    'top_vendor': df['vendeur'].value_counts().index[0],
-                    'stock_rate': (df['disponibilite'] == 'Disponible').mean()
+                    'price_performance_correlation': core['corr'],
+                    'top_vendor': core['top_vendor'],
+                    'stock_rate': core['stock_rate']
                 },
                 'recommendations': {
                     'pricing': "Adopter une stratégie dynamique basée sur la performance",
@@ -174,7 +434,8 @@ class CoTChatInterface:
         
         with col2:
             st.subheader("⭐ Scores par Vendeur")
-            vendor_scores = df.groupby('vendeur')['score_global'].mean().reset_index()
+            vendor_agg, _ = self.vendor_aggregates(df)
+            vendor_scores = vendor_agg['mean_score'].rename('score_global').reset_index()
             fig_vendor = px.bar(vendor_scores, x='vendeur', y='score_global',
                               title="Score Moyen par Vendeur")
             st.plotly_chart(fig_vendor, use_container_width=True)
@@ -186,104 +447,165 @@ class CoTChatInterface:
                                title="Prix vs Score Global")
         st.plotly_chart(fig_scatter, use_container_width=True)
     
-    def handle_chat_query(self, user_query, df=None):
-        """Gère les requêtes chat"""
-        response = ""
-        
-        # Analyse des intentions de la requête
-        query_lower = user_query.lower()
-        
-        if any(word in query_lower for word in ['prix', 'price', 'coût', 'tarif']):
-            if df is not None:
-                avg_price = df['prix'].mean()
-                median_price = df['prix'].median()
-                response = f"""
-                🧠 **Analyse CoT - Pricing:**
-                
-                **Étape 1 - Observation:**
-                Prix moyen: {avg_price:.2f}€
-                Prix médian: {median_price:.2f}€
-                
-                **Étape 2 - Raisonnement:**
-                {'Les prix sont homogènes' if abs(avg_price - median_price) < avg_price * 0.1 else 'Distribution des prix hétérogène'}
-                
-                **Étape 3 - Recommandation:**
-                {'Stratégie de prix uniforme possible' if abs(avg_price - median_price) < avg_price * 0.1 else 'Segmentation tarifaire recommandée'}
-                """
-        
-        elif any(word in query_lower for word in ['vendeur', 'fournisseur', 'supplier']):
-            if df is not None:
-                top_vendor = df['vendeur'].value_counts().index[0]
-                vendor_count = df['vendeur'].nunique()
-                response = f"""
-                🧠 **Analyse CoT - Vendeurs:**
-                
-                **Étape 1 - Observation:**
-                {vendor_count} vendeurs identifiés
-                Vendeur leader: {top_vendor}
-                
-                **Étape 2 - Analyse de concentration:**
-                Répartition: {df['vendeur'].value_counts().to_dict()}
-                
-                **Étape 3 - Recommandation:**
-                {'Diversifier le portefeuille' if df['vendeur'].value_counts().iloc[0] / len(df) > 0.5 else 'Concentration acceptable'}
-                """
-        
-        elif any(word in query_lower for word in ['recommandation', 'conseil', 'suggestion']):
-            response = """
-            🧠 **Recommandations Chain of Thought:**
-            
-            **1. Pricing (Priorité: Haute)**
-            - Raisonnement: Analyse de la corrélation prix-performance
-            - Action: Ajuster la stratégie tarifaire
-            
-            **2. Vendeurs (Priorité: Moyenne)**
-            - Raisonnement: Équilibrage du risque fournisseur
-            - Action: Diversifier ou concentrer selon la performance
-            
-            **3. Stock (Priorité: Haute)**
-            - Raisonnement: Impact direct sur les ventes
-            - Action: Optimiser les niveaux de disponibilité
-            
-            **4. Marketing (Priorité: Moyenne)**
-            - Raisonnement: ROI marketing sur produits performants
-            - Action: Réallouer le budget vers les stars
-            """
-        
-        elif any(word in query_lower for word in ['stock', 'inventaire', 'disponibilité']):
-            if df is not None:
-                stock_rate = (df['disponibilite'] == 'Disponible').mean()
-                response = f"""
-                🧠 **Analyse CoT - Inventaire:**
-                
-                **Étape 1 - État actuel:**
-                Taux de disponibilité: {stock_rate:.1%}
-                
-                **Étape 2 - Évaluation:**
-                {'Situation critique' if stock_rate < 0.8 else 'Situation acceptable'}
-                
-                **Étape 3 - Plan d'action:**
-                {'Renforcement immédiat des stocks' if stock_rate < 0.8 else 'Optimisation fine des niveaux'}
-                """
-        
-        else:
-            response = """
-            🧠 **Assistant CoT disponible pour:**
-            
-            📊 Analyses disponibles:
-            - Prix et stratégie tarifaire
-            - Performance des vendeurs
-            - Gestion des stocks
-            - Recommandations marketing
-            
-            💬 Exemples de questions:
-            - "Analyse les prix de mes produits"
-            - "Quels sont mes meilleurs vendeurs ?"
-            - "Donne-moi des recommandations"
-            - "Comment optimiser mon stock ?"
-            """
-        
-        return response
+    @staticmethod
+    def precompute_stats(df):
+        """Calcule une fois les agrégats consommés par le chat.
+
+        Chaque tour de conversation refaisait ses propres mean/median/
+        value_counts sur le DataFrame complet; avec ce dictionnaire calculé
+        après le scraping, le handler ne fait plus que du formatage O(1).
+        """
+        prix = df['prix'].to_numpy()
+        vendor_counts = Counter(df['vendeur'])
+        top5 = vendor_counts.most_common(5)
+        return {
+            'avg_price': float(np.mean(prix)),
+            'median_price': float(np.median(prix)),
+            'top_vendor': top5[0][0] if top5 else 'N/A',
+            'top_vendor_share': (top5[0][1] / len(df)) if top5 else 0.0,
+            'vendor_counts': dict(top5),
+            'n_vendors': len(vendor_counts),
+            'stock_rate': float((df['disponibilite'].to_numpy() == 'Disponible').mean()),
+        }
+
+    def handle_chat_query(self, user_query, df=None, stats=None):
+        """Gère les requêtes chat à partir des agrégats précalculés"""
+        if stats is None:
+            stats = st.session_state.get('cot_stats')
+        if stats is None and df is not None:
+            stats = self.precompute_stats(df)
+
+        # Une passe sur les tokens de la requête contre l'index inversé,
+        # puis dispatch direct vers le handler de l'intention
+        tokens = _TOKEN_RE.findall(user_query.lower())
+        intent = next((_INTENT_MAP[t] for t in tokens if t in _INTENT_MAP), 'help')
+        return getattr(self, f'_respond_{intent}')(stats)
+
+    def _respond_pricing(self, stats):
+        """Réponse chat: analyse des prix"""
+        if stats is None:
+            return ""
+        avg_price = stats['avg_price']
+        median_price = stats['median_price']
+        return f"""
+        🧠 **Analyse CoT - Pricing:**
+
+        **Étape 1 - Observation:**
+        Prix moyen: {avg_price:.2f}€
+        Prix médian: {median_price:.2f}€
+
+        **Étape 2 - Raisonnement:**
+        {'Les prix sont homogènes' if abs(avg_price - median_price) < avg_price * 0.1 else 'Distribution des prix hétérogène'}
+
+        **Étape 3 - Recommandation:**
+        {'Stratégie de prix uniforme possible' if abs(avg_price - median_price) < avg_price * 0.1 else 'Segmentation tarifaire recommandée'}
+        """
+
+    def _respond_vendor(self, stats):
+        """Réponse chat: analyse des vendeurs"""
+        if stats is None:
+            return ""
+        return f"""
+        🧠 **Analyse CoT - Vendeurs:**
+
+        **Étape 1 - Observation:**
+        {stats['n_vendors']} vendeurs identifiés
+        Vendeur leader: {stats['top_vendor']}
+
+        **Étape 2 - Analyse de concentration:**
+        Répartition (top 5): {stats['vendor_counts']}
+
+        **Étape 3 - Recommandation:**
+        {'Diversifier le portefeuille' if stats['top_vendor_share'] > 0.5 else 'Concentration acceptable'}
+        """
+
+    def _respond_recommendations(self, stats):
+        """Réponse chat: recommandations générales"""
+        return """
+        🧠 **Recommandations Chain of Thought:**
+
+        **1. Pricing (Priorité: Haute)**
+        - Raisonnement: Analyse de la corrélation prix-performance
+        - Action: Ajuster la stratégie tarifaire
+
+        **2. Vendeurs (Priorité: Moyenne)**
+        - Raisonnement: Équilibrage du risque fournisseur
+        - Action: Diversifier ou concentrer selon la performance
+
+        **3. Stock (Priorité: Haute)**
+        - Raisonnement: Impact direct sur les ventes
+        - Action: Optimiser les niveaux de disponibilité
+
+        **4. Marketing (Priorité: Moyenne)**
+        - Raisonnement: ROI marketing sur produits performants
+        - Action: Réallouer le budget vers les stars
+        """
+
+    def _respond_inventory(self, stats):
+        """Réponse chat: analyse de l'inventaire"""
+        if stats is None:
+            return ""
+        stock_rate = stats['stock_rate']
+        return f"""
+        🧠 **Analyse CoT - Inventaire:**
+
+        **Étape 1 - État actuel:**
+        Taux de disponibilité: {stock_rate:.1%}
+
+        **Étape 2 - Évaluation:**
+        {'Situation critique' if stock_rate < 0.8 else 'Situation acceptable'}
+
+        **Étape 3 - Plan d'action:**
+        {'Renforcement immédiat des stocks' if stock_rate < 0.8 else 'Optimisation fine des niveaux'}
+        """
+
+    def _respond_help(self, stats):
+        """Réponse chat: aide par défaut"""
+        return """
+        🧠 **Assistant CoT disponible pour:**
+
+        📊 Analyses disponibles:
+        - Prix et stratégie tarifaire
+        - Performance des vendeurs
+        - Gestion des stocks
+        - Recommandations marketing
+
+        💬 Exemples de questions:
+        - "Analyse les prix de mes produits"
+        - "Quels sont mes meilleurs vendeurs ?"
+        - "Donne-moi des recommandations"
+        - "Comment optimiser mon stock ?"
+        """
+
+
+# frozen sans slots=True: l'image de déploiement est en Python 3.9 et
+# dataclasses n'accepte slots qu'à partir de 3.10
+@dataclass(frozen=True)
+class SiteSelectors:
+    """Sélecteurs soupsieve compilés d'un site, repli sur les défauts déjà
+    résolu à la construction: le chemin chaud d'extraction se réduit à des
+    accès d'attribut, sans dict.get ni branche par champ"""
+    product_container: soupsieve.SoupSieve
+    title: soupsieve.SoupSieve
+    price: soupsieve.SoupSieve
+    availability: soupsieve.SoupSieve
+    rating: soupsieve.SoupSieve
+    description: soupsieve.SoupSieve
+    vendor: soupsieve.SoupSieve
+    category: soupsieve.SoupSieve
+    link: soupsieve.SoupSieve
+    pagination: soupsieve.SoupSieve
+
+@st.cache_resource
+def _load_rf(model_path):
+    """Charge le modèle RandomForest une seule fois par processus serveur.
+
+    cache_resource plutôt que cache_data: le modèle est une ressource
+    partagée, pas une donnée à hasher/copier, et son unpickling (coûteux pour
+    une forêt) ne se repaie plus à chaque rerun du script Streamlit.
+    """
+    with open(model_path, 'rb') as f:
+        return pickle.load(f)
 
 # Classe StreamlitDiverseScraper
 class StreamlitDiverseScraper:
@@ -297,7 +619,40 @@ class StreamlitDiverseScraper:
             'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
         }
-        
+
+        # Session partagée: la connexion TCP/TLS est réutilisée entre les pages
+        # d'un même site au lieu d'être rouverte à chaque requête
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # Pool de connexions dimensionné pour le scraping concurrent et
+        # retries avec backoff gérés par urllib3 (plus de boucle manuelle)
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.5,
+                              status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # Tampon de logs par thread: les workers du scraping concurrent ne
+        # touchent pas st.session_state (réservé au thread principal)
+        self._log_local = threading.local()
+
+        # Générateur NumPy unique pour tous les tirages de repli: pas de
+        # random.choice Python par valeur manquante ni de re-seed du RNG global
+        self._rng = np.random.default_rng(42)
+        self._price_fallbacks = np.array([19.99, 29.99, 49.99, 79.99, 99.99], dtype=np.float32)
+        self._rating_fallbacks = np.array([3, 3.5, 4, 4.5, 5], dtype=np.float32)
+
+        # Statistiques du scaler ajustées une seule fois puis gardées en
+        # float32 (écart-type stocké inversé): la standardisation du chemin
+        # top-5 devient un broadcast (X - mean) * inv_scale au lieu d'un
+        # fit_transform par appel — et multiplier bat diviser élément par
+        # élément
+        self._scaler_mean = None
+        self._scaler_inv_scale = None
+
         self.selectors = {
             'product_container': '.thumbnail, .product-wrapper, .card, .product-item, .item, article.product_pod, .product-grid, .item-container, li',
             'title': '.title, h4 a, .card-title, .product-title, h3 a, .name, h1, h2, h3, h4, h5',
@@ -425,6 +780,25 @@ class StreamlitDiverseScraper:
             }
         }
         
+        # Sélecteurs CSS compilés une fois par site: soupsieve ne re-parse plus
+        # la chaîne de sélecteur à chaque produit extrait, et le repli sur les
+        # sélecteurs génériques est résolu ici plutôt que dans la boucle interne
+        default_compiled = {
+            field: soupsieve.compile(sel) for field, sel in self.selectors.items()
+        }
+        self._compiled_default = SiteSelectors(**default_compiled)
+        self._compiled = {}
+        for site_key, cfg in self.diverse_sites.items():
+            sels = cfg.get('selectors', self.selectors)
+            if sels is self.selectors:
+                self._compiled[site_key] = self._compiled_default
+            else:
+                merged = dict(default_compiled)
+                merged.update({
+                    field: soupsieve.compile(sel) for field, sel in sels.items() if sel
+                })
+                self._compiled[site_key] = SiteSelectors(**merged)
+
         if 'scraping_logs' not in st.session_state:
             st.session_state.scraping_logs = []
         if 'scraped_products' not in st.session_state:
@@ -435,25 +809,27 @@ class StreamlitDiverseScraper:
             st.session_state.stop_scraping = False
     
     def log_message(self, message, level="INFO"):
-        """Ajoute un message aux logs de session"""
+        """Ajoute un message aux logs de session (ou au tampon du worker)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
         log_entry = f"[{timestamp}] {level}: {message}"
-        st.session_state.scraping_logs.append(log_entry)
+        buffer = getattr(self._log_local, 'buffer', None)
+        if buffer is not None:
+            buffer.append(log_entry)
+        else:
+            st.session_state.scraping_logs.append(log_entry)
         return log_entry
-    
-    def _make_request(self, url, retries=3):
-        """Effectue une requête HTTP avec gestion des erreurs"""
-        for attempt in range(retries):
-            try:
-                response = requests.get(url, headers=self.headers, timeout=10)
-                response.raise_for_status()
-                response.encoding = 'utf-8'
-                return response
-            except requests.RequestException as e:
-                self.log_message(f"Erreur requête {url} (tentative {attempt + 1}): {e}", "WARNING")
-                if attempt < retries - 1:
-                    time.sleep(2 ** attempt)
-        return None
+
+    def _make_request(self, url):
+        """Effectue une requête HTTP (retries/backoff assurés par l'adaptateur)"""
+        try:
+            response = self.session.get(url, timeout=10)
+            response.raise_for_status()
+            # Pas d'encoding forcé: tout le code aval consomme response.content
+            # (octets bruts), le décodage est laissé à lxml/orjson en C
+            return response
+        except requests.RequestException as e:
+            self.log_message(f"Erreur requête {url}: {e}", "WARNING")
+            return None
     
     def _random_delay(self, min_delay=0.5, max_delay=2):
         """Pause aléatoire entre les requêtes"""
@@ -464,75 +840,89 @@ class StreamlitDiverseScraper:
         """Nettoie et normalise le texte"""
         if not text:
             return ""
-        text = re.sub(r'\s+', ' ', text.strip())
-        text = text.replace(';', ',').replace('\n', ' ').replace('\r', ' ')
-        return text[:300]
-    
-    def _extract_price(self, price_element):
-        """Extrait et normalise le prix"""
-        if not price_element:
-            return str(random.choice([19.99, 29.99, 49.99, 79.99, 99.99]))
-        price_text = self._clean_text(price_element.get_text())
-        price_match = re.search(r'[\d,]+\.?\d*', price_text.replace(',', ''))
-        if price_match:
-            try:
-                return str(float(price_match.group()))
-            except:
-                pass
-        return str(random.choice([19.99, 29.99, 49.99, 79.99, 99.99]))
+        # Un sub pré-compilé puis une table de translittération (un seul
+        # parcours de chaîne au lieu de trois replace chaînés)
+        return _WS_RE.sub(' ', text.strip()).translate(_TRANS)[:300]
+
+    def _vectorize_prices_ratings(self, raw_prices, raw_ratings):
+        """Normalise prix et notes d'une page entière en une seule passe.
+
+        Le couple regex + cast float n'est plus payé produit par produit:
+        les chaînes brutes de la page passent par les opérations .str
+        vectorisées de pandas, et les valeurs illisibles reçoivent leurs
+        défauts aléatoires tirés en bloc.
+        """
+        prix = (pd.Series(raw_prices, dtype='object')
+                .str.replace(',', '', regex=False)
+                .str.extract(_PRICE_RE, expand=False)
+                .astype('float32'))
+        # Virgule décimale ("4,5") convertie en point, et to_numeric en mode
+        # coerce: une note illisible redevient NaN (donc défaut aléatoire)
+        # au lieu de faire échouer toute la catégorie dans le worker
+        note = pd.to_numeric(
+            pd.Series(raw_ratings, dtype='object')
+            .str.replace(',', '.', regex=False)
+            .str.extract(_PRICE_RE, expand=False),
+            errors='coerce').astype('float32')
+        missing = prix.isna().to_numpy()
+        if missing.any():
+            prix.iloc[missing] = self._rng.choice(self._price_fallbacks, size=int(missing.sum()))
+        missing = note.isna().to_numpy()
+        if missing.any():
+            note.iloc[missing] = self._rng.choice(self._rating_fallbacks, size=int(missing.sum()))
+        return prix.to_numpy(dtype=np.float32), note.to_numpy(dtype=np.float32)
     
-    def _extract_product_data(self, product_element, category_name, page_url, selectors):
-        """Extrait les données d'un produit avec sélecteurs spécifiques"""
-        title_elem = product_element.select_one(selectors.get('title', '.title'))
+    def _extract_product_data(self, product_element, category_name, page_url, compiled):
+        """Extrait les données d'un produit avec sélecteurs pré-compilés"""
+        title_elem = compiled.title.select_one(product_element)
         title = self._clean_text(title_elem.get_text() if title_elem else "")
         if title_elem and title_elem.has_attr('title'):
             title = title or self._clean_text(title_elem['title'])
         if not title:
             title = self._clean_text(product_element.get_text()[:100])
-        
-        price_elem = product_element.select_one(selectors.get('price', '.price'))
-        price = self._extract_price(price_elem)
-        
-        avail_elem = product_element.select_one(selectors.get('availability', '.availability'))
+
+        # Prix et note sont gardés bruts ici; la page entière est normalisée
+        # en une passe vectorisée dans _vectorize_prices_ratings
+        price_elem = compiled.price.select_one(product_element)
+        price_raw = self._clean_text(price_elem.get_text()) if price_elem else ""
+
+        avail_elem = compiled.availability.select_one(product_element)
         availability = "Disponible"
         if avail_elem:
             avail_text = self._clean_text(avail_elem.get_text()).lower()
             if 'out' in avail_text or 'rupture' in avail_text:
                 availability = "Rupture"
         
-        rating_elem = product_element.select_one(selectors.get('rating', '.rating'))
-        rating = ""
+        rating_elem = compiled.rating.select_one(product_element)
+        rating_raw = ""
         if rating_elem:
-            if 'star-rating' in rating_elem.get('class', []):
-                rating_classes = rating_elem.get('class', [])
-                rating_map = {'One': '1', 'Two': '2', 'Three': '3', 'Four': '4', 'Five': '5'}
+            rating_classes = rating_elem.get('class', [])
+            if 'star-rating' in rating_classes:
                 for cls in rating_classes:
-                    if cls in rating_map:
-                        rating = rating_map[cls]
+                    if cls in _RATING_WORDS:
+                        rating_raw = _RATING_WORDS[cls]
                         break
             else:
-                rating = self._extract_price(rating_elem)
-        if not rating:
-            rating = str(random.choice([3, 3.5, 4, 4.5, 5]))
+                rating_raw = self._clean_text(rating_elem.get_text())
         
-        desc_elem = product_element.select_one(selectors.get('description', '.description'))
+        desc_elem = compiled.description.select_one(product_element)
         description = self._clean_text(desc_elem.get_text() if desc_elem else "")
-        
-        vendor_elem = product_element.select_one(selectors.get('vendor', '.vendor'))
+
+        vendor_elem = compiled.vendor.select_one(product_element)
         vendor = self._clean_text(vendor_elem.get_text() if vendor_elem else "N/A")
         
         category = category_name.replace('_', ' ').title()
         if 'jsonplaceholder' in category_name:
             category = "Digital Content"
         
-        link_elem = product_element.select_one(selectors.get('link', 'a'))
+        link_elem = compiled.link.select_one(product_element)
         product_link = urljoin(page_url, link_elem['href']) if link_elem and link_elem.has_attr('href') else page_url
         
         return {
             'titre': title,
-            'prix': float(price) if price else 0.0,
+            '_prix_brut': price_raw,
             'disponibilite': availability,
-            'note_moyenne': float(rating) if rating else 0.0,
+            '_note_brute': rating_raw,
             'description': description[:200] + "..." if len(description) > 200 else description,
             'vendeur': vendor,
             'categorie': category,
@@ -552,11 +942,11 @@ class StreamlitDiverseScraper:
         if not title:
             title = "Digital Item"
 
-        price = json_element.get('price', random.uniform(9.99, 99.99))
+        price = json_element.get('price', float(self._rng.uniform(9.99, 99.99)))
         if isinstance(price, (int, float)):
             price = float(price)
         else:
-            price = random.uniform(9.99, 99.99)
+            price = float(self._rng.uniform(9.99, 99.99))
 
         description = self._clean_text(json_element.get('description', json_element.get('body', '')[:200]))
         if not description:
@@ -564,14 +954,14 @@ class StreamlitDiverseScraper:
 
         vendor = json_element.get('brand', json_element.get('author', 'Digital Store'))
 
-        rating = json_element.get('rating', {}).get('rate', random.choice([3, 3.5, 4, 4.5, 5]))
+        rating = json_element.get('rating', {}).get('rate', float(self._rating_fallbacks[self._rng.integers(0, 5)]))
         if isinstance(rating, dict):
-            rating = random.choice([3, 3.5, 4, 4.5, 5])
+            rating = float(self._rating_fallbacks[self._rng.integers(0, 5)])
 
         return {
             'titre': title,
             'prix': round(price, 2),
-            'disponibilite': random.choice(['Disponible', 'Rupture']),
+            'disponibilite': 'Disponible' if self._rng.integers(0, 2) else 'Rupture',
             'note_moyenne': float(rating),
             'description': description,
             'vendeur': self._clean_text(vendor),
@@ -580,9 +970,9 @@ class StreamlitDiverseScraper:
             'source': category_name.split('_')[0] if '_' in category_name else category_name
         }
     
-    def _get_next_page_url(self, soup, current_url, selectors):
+    def _get_next_page_url(self, soup, current_url, compiled):
         """Trouve l'URL de la page suivante"""
-        next_links = soup.select(selectors.get('pagination', '.pagination a'))
+        next_links = compiled.pagination.select(soup)
         for link in next_links:
             if link.has_attr('href'):
                 link_text = self._clean_text(link.get_text()).lower()
@@ -594,8 +984,15 @@ class StreamlitDiverseScraper:
         """Scrape une catégorie spécifique d'un site avec barre de progression"""
         base_url = site_config['base_url']
         url = base_url + category_path
-        selectors = site_config.get('selectors', self.selectors)
-        
+        compiled = self._compiled.get(site_name, self._compiled_default)
+
+        # Tampon local pour toute la catégorie: un seul extend du journal de
+        # session à la fin, au lieu d'un append proxifié par Streamlit à
+        # chaque message (et le journal reste borné)
+        own_buffer = getattr(self._log_local, 'buffer', None) is None
+        if own_buffer:
+            self._log_local.buffer = []
+
         self.log_message(f"Début scraping: {site_name} - {category_name}")
         
         products = []
@@ -616,7 +1013,7 @@ class StreamlitDiverseScraper:
             
             if 'jsonplaceholder' in site_name or 'dummy_products' in site_name or 'fake_store' in site_name:
                 try:
-                    json_data = response.json()
+                    json_data = _json_loads(response.content)
                     if isinstance(json_data, dict) and 'products' in json_data:
                         json_data = json_data['products']
                     if isinstance(json_data, list):
@@ -635,13 +1032,14 @@ class StreamlitDiverseScraper:
                     self.log_message(f"Erreur JSON: {e}", "WARNING")
                     break
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            container_selector = selectors.get('product_container', '.product')
-            product_elements = soup.select(container_selector)
-            
+            # Parser lxml (C) au lieu de html.parser (Python pur)
+            soup = BeautifulSoup(response.content, 'lxml')
+
+            container = compiled.product_container
+            product_elements = container.select(soup)
+
             if not product_elements:
-                self.log_message(f"Aucun produit trouvé avec '{container_selector}'", "WARNING")
+                self.log_message(f"Aucun produit trouvé avec '{container.pattern}'", "WARNING")
                 for alt_selector in ['article', '.item', '.product-item', 'li', '.product-grid']:
                     product_elements = soup.select(alt_selector)
                     if product_elements:
@@ -654,18 +1052,30 @@ class StreamlitDiverseScraper:
             
             self.log_message(f"Trouvé {len(product_elements)} éléments")
             
+            page_products = []
             for product_elem in product_elements:
                 try:
                     product_data = self._extract_product_data(
-                        product_elem, f"{site_name}_{category_name}", current_url, selectors
+                        product_elem, f"{site_name}_{category_name}", current_url, compiled
                     )
                     if product_data['titre']:
-                        products.append(product_data)
+                        page_products.append(product_data)
                 except Exception as e:
                     self.log_message(f"Erreur extraction: {e}", "WARNING")
                     continue
+
+            if page_products:
+                # Normalisation vectorisée des prix/notes de toute la page
+                prix_vals, note_vals = self._vectorize_prices_ratings(
+                    [p.pop('_prix_brut') for p in page_products],
+                    [p.pop('_note_brute') for p in page_products],
+                )
+                for product, prix, note in zip(page_products, prix_vals, note_vals):
+                    product['prix'] = float(prix)
+                    product['note_moyenne'] = float(note)
+                products.extend(page_products)
             
-            next_url = self._get_next_page_url(soup, current_url, selectors)
+            next_url = self._get_next_page_url(soup, current_url, compiled)
             if next_url == current_url or not next_url:
                 break
             current_url = next_url
@@ -673,47 +1083,138 @@ class StreamlitDiverseScraper:
             self._random_delay(1, 2)
         
         self.log_message(f"{site_name}/{category_name} terminé: {len(products)} produits")
+
+        if own_buffer:
+            logs, self._log_local.buffer = self._log_local.buffer, None
+            st.session_state.scraping_logs.extend(logs)
+            del st.session_state.scraping_logs[:-_MAX_LOG_LINES]
+
         return products
-    
+
+    def scrape_categories_concurrent(self, jobs, max_pages=5, max_workers=8):
+        """Scrape plusieurs catégories en parallèle avec un pool borné.
+
+        Le scraping est dominé par l'attente réseau: les workers recouvrent
+        les allers-retours HTTP de catégories différentes pendant que la
+        pagination interne de chaque catégorie reste séquentielle (chaque page
+        suivante dépend du parsing de la précédente). Les logs des workers
+        sont tamponnés en thread-local puis reversés dans st.session_state
+        depuis le thread principal.
+        """
+        def _worker(job):
+            site_key, site_config, cat_name, cat_path = job
+            self._log_local.buffer = []
+            try:
+                products = self.scrape_site_category(
+                    site_key, site_config, cat_name, cat_path, max_pages=max_pages
+                )
+                return products, self._log_local.buffer
+            finally:
+                self._log_local.buffer = None
+
+        # Produits et logs accumulés en local, reversés dans session_state en
+        # une seule écriture à la fin: le suivi de modifications de Streamlit
+        # ne se paie qu'une fois par crawl, pas par catégorie terminée
+        all_products = []
+        pending_logs = []
+        st.session_state.stop_scraping = False  # nouveau crawl, drapeau remis à zéro
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_worker, job) for job in jobs]
+            for future in as_completed(futures):
+                products, logs = future.result()
+                pending_logs.extend(logs)
+                all_products.extend(products)
+                if st.session_state.get('stop_scraping'):
+                    # Arrêt demandé via le bouton: les catégories pas encore
+                    # démarrées sont annulées, celles en cours terminent
+                    # leur page courante
+                    for pending in futures:
+                        pending.cancel()
+                    timestamp = datetime.now().strftime("%H:%M:%S")
+                    pending_logs.append(f"[{timestamp}] INFO: ⏹️ Scraping arrêté par l'utilisateur")
+                    break
+        st.session_state.scraping_logs.extend(pending_logs)
+        del st.session_state.scraping_logs[:-_MAX_LOG_LINES]
+        return all_products
+
+    def scrape_all(self, selected_sites, max_pages=5, max_workers=8):
+        """Scrape toutes les catégories des sites sélectionnés en un seul pool.
+
+        Étend la parallélisation par site à l'ensemble du crawl: les paires
+        (site, catégorie) partent toutes dans le même pool borné, le temps
+        total n'est plus la somme des sites mais celui du site le plus lent.
+        """
+        jobs = [
+            (site_key, self.diverse_sites[site_key], cat_name, cat_path)
+            for site_key, selected in selected_sites.items()
+            if selected and site_key in self.diverse_sites
+            for cat_name, cat_path in self.diverse_sites[site_key]['categories'].items()
+        ]
+        return self.scrape_categories_concurrent(jobs, max_pages=max_pages, max_workers=max_workers)
+
     def select_top_5_products(self, df, model_path="random_forest_model.pkl"):
         """Sélectionne les 5 meilleurs produits à l'aide du modèle RandomForest"""
+        # Mémoïsation en session: préparation + predict sont des fonctions
+        # pures du lot scrapé, donc le pipeline sklearn n'est relancé que
+        # quand le nombre de produits change (même invalidation que
+        # _session_df), pas à chaque rerun de l'onglet
+        if (st.session_state.get('top5_df') is not None
+                and st.session_state.get('top5_n') == len(df)):
+            return st.session_state.top5_df
         try:
-            # Charger le modèle
-            with open(model_path, 'rb') as file:
-                model = pickle.load(file)
-            
+            # Charger le modèle (mis en cache au niveau du processus)
+            model = _load_rf(model_path)
+
             # Vérifier si le modèle a une méthode predict
             if not hasattr(model, 'predict'):
                 raise ValueError("Le fichier chargé n'est pas un modèle scikit-learn valide avec predict.")
             
-            # Préparer les données pour la prédiction
-            features = ['prix', 'note_moyenne', 'ventes_estimees', 'dispo_score']
-            X = df[['prix', 'note_moyenne']].copy()  # Base columns from scraped data
-            
-            # Calculer ventes_estimees basé sur la note_moyenne
-            np.random.seed(42)  # Pour reproductibilité
-            X['ventes_estimees'] = np.where(
-                df['note_moyenne'] > 3,
-                np.random.poisson(lam=50, size=len(df)),
-                np.random.poisson(lam=20, size=len(df))
-            )
-            
-            # Calculer dispo_score basé sur disponibilité
-            availability_mapping = {
-                'Disponible': 1.0,
-                'Stock limité': 0.7,
-                'Rupture': 0.0,
-                'Inconnu': 0.5
-            }
-            X['dispo_score'] = df['disponibilite'].map(availability_mapping).fillna(0.5)
-            
-            # Gérer les valeurs manquantes
-            X = X.fillna(X.mean())
-            
-            # Standardisation des caractéristiques
-            scaler = StandardScaler()
-            X_scaled = scaler.fit_transform(X)
-            
+            # Préparer les données pour la prédiction: colonnes NumPy float32
+            # contiguës (structure de tableaux) au lieu d'une copie de
+            # DataFrame indexée colonne par colonne
+            prix = df['prix'].to_numpy(dtype=np.float32)
+            note = df['note_moyenne'].to_numpy(dtype=np.float32)
+
+            # ventes_estimees: un seul tirage de Poisson avec lambda par
+            # ligne (50 si bien noté, 20 sinon) au lieu de deux vecteurs
+            # complets dont la moitié était jetée
+            rng = np.random.default_rng(42)  # Pour reproductibilité
+            lam = np.where(note > 3.0, 50.0, 20.0)
+            ventes = rng.poisson(lam=lam).astype(np.float32)
+
+            # Calculer dispo_score: un gather dans la table _DISPO_LUT via
+            # les codes catégoriels, les valeurs hors référentiel tombant sur
+            # 'Inconnu' (plus de map/fillna ligne par ligne)
+            codes = df['disponibilite'].astype(_DISPO_CATS).cat.codes.to_numpy().copy()
+            codes[codes < 0] = 1
+            dispo = _DISPO_LUT[codes]
+
+            # Matrice (prix, note_moyenne, ventes_estimees, dispo_score).
+            # Premier lot: assemblage seul, pour ajuster le scaler sur les
+            # valeurs brutes. Lots suivants: noyau fusionné qui assemble et
+            # standardise en une seule passe sur chaque élément
+            if self._scaler_mean is None:
+                X = _build_features(prix, note, dispo, ventes)
+                # Gérer les valeurs manquantes par la moyenne de colonne
+                nan_mask = np.isnan(X)
+                if nan_mask.any():
+                    inds = np.nonzero(nan_mask)
+                    X[inds] = np.take(np.nanmean(X, axis=0), inds[1])
+                scaler = StandardScaler(copy=False)
+                scaler.fit(X)
+                self._scaler_mean = scaler.mean_.astype(np.float32)
+                self._scaler_inv_scale = (1.0 / scaler.scale_).astype(np.float32)
+                np.subtract(X, self._scaler_mean, out=X)
+                np.multiply(X, self._scaler_inv_scale, out=X)
+            else:
+                X = _build_features_scaled(prix, note, dispo, ventes,
+                                           self._scaler_mean, self._scaler_inv_scale)
+                # En espace standardisé, la moyenne d'imputation vaut 0
+                nan_mask = np.isnan(X)
+                if nan_mask.any():
+                    X[nan_mask] = 0.0
+            X_scaled = X
+
             # Faire les prédictions (regression, donc predict seulement)
             try:
                 predictions = model.predict(X_scaled)
@@ -721,25 +1222,53 @@ class StreamlitDiverseScraper:
                 self.log_message(f"Erreur lors de la prédiction: {e}", "ERROR")
                 return pd.DataFrame()
             
-            # Ajouter les prédictions au DataFrame
-            df['prediction_score'] = predictions
-            
-            # Trier et sélectionner les 5 meilleurs produits
-            top_5_df = df.sort_values(by='prediction_score', ascending=False).head(5)
-            
-            return top_5_df[
+            # Ajouter les prédictions au DataFrame (float32, comme le reste
+            # du pipeline — predict renvoie du float64)
+            df['prediction_score'] = predictions.astype(np.float32, copy=False)
+            
+            # Sélection partielle O(N): argpartition isole les 5 meilleurs
+            # scores et seul ce petit bloc est trié, au lieu d'un tri
+            # complet du DataFrame
+            k = min(5, len(predictions))
+            top_idx = np.argpartition(predictions, -k)[-k:]
+            top_idx = top_idx[np.argsort(predictions[top_idx])[::-1]]
+            top_5_df = df.iloc[top_idx]
+
+            top_5_df = top_5_df[
                 ['titre', 'prix', 'note_moyenne', 'categorie', 'disponibilite', 'vendeur', 'source', 'lien_produit', 'prediction_score']
             ]
+            st.session_state.top5_df = top_5_df
+            st.session_state.top5_n = len(df)
+            return top_5_df
         except Exception as e:
             self.log_message(f"Erreur lors de la sélection des top-5 produits: {e}", "ERROR")
             return pd.DataFrame()
 
-def create_download_link(df, filename):
-    """Crée un lien de téléchargement pour le DataFrame"""
-    csv = df.to_csv(index=False, encoding='utf-8', sep=';')
-    b64 = base64.b64encode(csv.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="{filename}">Télécharger {filename}</a>'
-    return href
+def _download_button(df, filename, cache_key=None):
+    """Bouton de téléchargement CSV natif Streamlit.
+
+    Les octets CSV sont servis directement: plus de data-URI base64 injecté
+    dans la page (qui triplait la charge mémoire str -> bytes -> base64 et
+    gonflait le HTML de ~33%). Avec cache_key, la sérialisation to_csv n'est
+    refaite que quand le lot ou les filtres changent, pas à chaque rerun.
+    """
+    data = None
+    if cache_key is not None:
+        cache = st.session_state.setdefault('csv_cache', {})
+        data = cache.get(cache_key)
+    if data is None:
+        data = df.to_csv(index=False, sep=';').encode('utf-8')
+        if cache_key is not None:
+            if len(cache) >= 16:
+                cache.clear()
+            cache[cache_key] = data
+    st.download_button(
+        f"Télécharger {filename}",
+        data=data,
+        file_name=filename,
+        mime='text/csv',
+        key=f"dl_{filename}"
+    )
 
 def main():
     """Interface principale Streamlit"""
@@ -785,7 +1314,7 @@ def main():
     
     # Statistiques rapides
     if st.session_state.scraped_products:
-        df = pd.DataFrame(st.session_state.scraped_products)
+        df = _session_df()
         st.sidebar.subheader("📊 Aperçu rapide")
         st.sidebar.metric("Produits", len(df))
         st.sidebar.metric("Prix moyen", f"{df['prix'].mean():.0f}€")
@@ -821,7 +1350,12 @@ def main():
         
         # Scraping par site individuel
         st.subheader("🎯 Scraping Par Site")
-        
+
+        # Comptages par source calculés en une seule passe avant la grille:
+        # les listcomps par widget refaisaient O(sites·catégories·N) tests
+        # Python à chaque rerun
+        source_counts = Counter(p.get('source', '') for p in st.session_state.scraped_products)
+
         for site_key, site_config in scraper.diverse_sites.items():
             if not selected_sites.get(site_key, False):
                 continue
@@ -837,7 +1371,7 @@ def main():
                         st.session_state[f'scrape_site_{site_key}'] = True
                 
                 with col2:
-                    site_products = len([p for p in st.session_state.scraped_products if p.get('source') == site_key])
+                    site_products = source_counts.get(site_key, 0)
                     st.metric("Produits", site_products)
                 
                 st.markdown("**Catégories disponibles:**")
@@ -849,8 +1383,8 @@ def main():
                     cols = st.columns(cols_per_row)
                     for j, (cat_name, cat_path) in enumerate(categories_list[i:i+cols_per_row]):
                         with cols[j]:
-                            cat_products = len([p for p in st.session_state.scraped_products 
-                                              if f"{site_key}_{cat_name}" in p.get('source', '')])
+                            cat_key = f"{site_key}_{cat_name}"
+                            cat_products = sum(c for s, c in source_counts.items() if cat_key in s)
                             
                             button_text = f"📂 {cat_name.replace('_', ' ').title()}"
                             if cat_products > 0:
@@ -875,42 +1409,15 @@ def main():
                 status_text = st.empty()
                 current_progress = st.progress(0)
                 
-                total_sites = sum(1 for v in selected_sites.values() if v)
-                site_counter = 0
-                
-                for site_key, selected in selected_sites.items():
-                    if not selected or total_products >= target_products:
-                        continue
-                    
-                    if st.session_state.get('stop_scraping', False):
-                        st.session_state.stop_scraping = False
-                        break
-                    
-                    site_counter += 1
-                    site_config = scraper.diverse_sites[site_key]
-                    
-                    status_text.text(f"Scraping {site_config['name']} ({site_counter}/{total_sites})")
-                    overall_progress.progress(site_counter / total_sites)
-                    
-                    for cat_name, cat_path in site_config['categories'].items():
-                        if total_products >= target_products:
-                            break
-                        
-                        if st.session_state.get('stop_scraping', False):
-                            break
-                        
-                        try:
-                            products = scraper.scrape_site_category(
-                                site_key, site_config, cat_name, cat_path, 
-                                max_pages=max_pages, progress_bar=current_progress
-                            )
-                            
-                            if products:
-                                st.session_state.scraped_products.extend(products)
-                                total_products += len(products)
-                            
-                        except Exception as e:
-                            scraper.log_message(f"Erreur {site_key}/{cat_name}: {e}", "ERROR")
+                # Toutes les paires (site, catégorie) partent dans un seul pool
+                status_text.text("Scraping de tous les sites sélectionnés...")
+                try:
+                    products = scraper.scrape_all(selected_sites, max_pages=max_pages)
+                    if products:
+                        st.session_state.scraped_products.extend(products[:target_products])
+                        total_products = len(st.session_state.scraped_products)
+                except Exception as e:
+                    scraper.log_message(f"Erreur scraping global: {e}", "ERROR")
                 
                 overall_progress.progress(1.0)
                 status_text.text(f"✅ Scraping terminé! ")
@@ -926,53 +1433,53 @@ def main():
                 st.session_state[f'scrape_site_{site_key}'] = False
                 
                 with st.spinner(f"Scraping de {site_config['name']}..."):
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-                    
-                    total_cats = len(site_config['categories'])
-                    cat_counter = 0
-                    
-                    for cat_name, cat_path in site_config['categories'].items():
-                        cat_counter += 1
-                        status_text.text(f"Scraping {cat_name} ({cat_counter}/{total_cats})")
-                        progress_bar.progress(cat_counter / total_cats)
-                        
-                        try:
-                            products = scraper.scrape_site_category(
-                                site_key, site_config, cat_name, cat_path, max_pages=max_pages
-                            )
-                            if products:
-                                st.session_state.scraped_products.extend(products)
-                        except Exception as e:
-                            scraper.log_message(f"Erreur {site_key}/{cat_name}: {e}", "ERROR")
-                    
+                    # Toutes les catégories du site partent en parallèle
+                    jobs = [
+                        (site_key, site_config, cat_name, cat_path)
+                        for cat_name, cat_path in site_config['categories'].items()
+                    ]
+                    try:
+                        products = scraper.scrape_categories_concurrent(jobs, max_pages=max_pages)
+                        if products:
+                            st.session_state.scraped_products.extend(products)
+                    except Exception as e:
+                        scraper.log_message(f"Erreur {site_key}: {e}", "ERROR")
+
                     st.success(f"✅ Site {site_config['name']} terminé!")
         
-        # Gestion du scraping par catégorie
-        for site_key, site_config in scraper.diverse_sites.items():
-            for cat_name, cat_path in site_config['categories'].items():
-                if st.session_state.get(f'scrape_cat_{site_key}_{cat_name}', False):
-                    st.session_state[f'scrape_cat_{site_key}_{cat_name}'] = False
-                    
-                    with st.spinner(f"Scraping {cat_name} de {site_config['name']}..."):
-                        try:
-                            products = scraper.scrape_site_category(
-                                site_key, site_config, cat_name, cat_path, max_pages=max_pages
-                            )
-                            if products:
-                                st.session_state.scraped_products.extend(products)
-                                st.success(f"✅ Catégorie {cat_name} terminée! {len(products)} produits ajoutés")
-                            else:
-                                st.warning(f"Aucun produit trouvé pour {cat_name}")
-                        except Exception as e:
-                            st.error(f"Erreur lors du scraping de {cat_name}: {e}")
-                            scraper.log_message(f"Erreur {site_key}/{cat_name}: {e}", "ERROR")
+        # Gestion du scraping par catégorie: table de dispatch aplatie,
+        # construite une fois par session — la double boucle reformatait une
+        # clé f-string et interrogeait session_state pour chacune des
+        # ~50 paires (site, catégorie) à chaque rerun
+        if 'cat_dispatch' not in st.session_state:
+            st.session_state.cat_dispatch = [
+                (sk, cn, cp, f'scrape_cat_{sk}_{cn}')
+                for sk, sc in scraper.diverse_sites.items()
+                for cn, cp in sc['categories'].items()
+            ]
+        for site_key, cat_name, cat_path, dispatch_key in st.session_state.cat_dispatch:
+            # pop: le déclencheur est consommé, plus de réinitialisation
+            if st.session_state.pop(dispatch_key, False):
+                site_config = scraper.diverse_sites[site_key]
+                with st.spinner(f"Scraping {cat_name} de {site_config['name']}..."):
+                    try:
+                        products = scraper.scrape_site_category(
+                            site_key, site_config, cat_name, cat_path, max_pages=max_pages
+                        )
+                        if products:
+                            st.session_state.scraped_products.extend(products)
+                            st.success(f"✅ Catégorie {cat_name} terminée! {len(products)} produits ajoutés")
+                        else:
+                            st.warning(f"Aucun produit trouvé pour {cat_name}")
+                    except Exception as e:
+                        st.error(f"Erreur lors du scraping de {cat_name}: {e}")
+                        scraper.log_message(f"Erreur {site_key}/{cat_name}: {e}", "ERROR")
     
     with tab2:
         st.header("📊 Données Scrapées")
         
         if st.session_state.scraped_products:
-            df = pd.DataFrame(st.session_state.scraped_products)
+            df = _session_df()
             
             # Statistiques générales
             col1, col2, col3, col4, col5 = st.columns(5)
@@ -983,7 +1490,7 @@ def main():
             with col3:
                 st.metric("Note Moyenne", f"{df['note_moyenne'].mean():.1f}/5")
             with col4:
-                disponibles = len(df[df['disponibilite'] == 'Disponible'])
+                disponibles = int(CoTChatInterface.dispo_bitmap(df).sum())
                 st.metric("Disponibles", f"{disponibles} ({disponibles/len(df)*100:.1f}%)")
             with col5:
                 categories_uniques = df['categorie'].nunique()
@@ -991,13 +1498,8 @@ def main():
             
             # Statistiques par source
             st.subheader("📋 Résumé par Source")
-            source_summary = df.groupby('source').agg({
-                'titre': 'count',
-                'prix': 'mean',
-                'note_moyenne': 'mean',
-                'categorie': 'nunique'
-            }).round(2)
-            source_summary.columns = ['Produits', 'Prix Moyen (€)', 'Note Moyenne', 'Catégories']
+            source_summary = _source_summary(df).set_axis(
+                ['Produits', 'Prix Moyen (€)', 'Note Moyenne', 'Catégories'], axis=1)
             
             for source in source_summary.index:
                 col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
@@ -1049,21 +1551,21 @@ def main():
                     (float(df['note_moyenne'].min()), float(df['note_moyenne'].max()))
                 )
             
-            # Application des filtres
-            filtered_df = df.copy()
+            # Application des filtres: un seul masque composite puis une
+            # seule prise de lignes — l'ancienne cascade rematérialisait le
+            # DataFrame jusqu'à cinq fois par réglage de curseur
+            mask = np.ones(len(df), dtype=bool)
             if selected_category != 'Toutes':
-                filtered_df = filtered_df[filtered_df['categorie'] == selected_category]
+                mask &= (df['categorie'] == selected_category).to_numpy()
             if selected_source != 'Toutes':
-                filtered_df = filtered_df[filtered_df['source'] == selected_source]
+                mask &= (df['source'] == selected_source).to_numpy()
             if selected_availability != 'Toutes':
-                filtered_df = filtered_df[filtered_df['disponibilite'] == selected_availability]
-            
-            filtered_df = filtered_df[
-                (filtered_df['prix'] >= price_range[0]) & 
-                (filtered_df['prix'] <= price_range[1]) &
-                (filtered_df['note_moyenne'] >= rating_range[0]) & 
-                (filtered_df['note_moyenne'] <= rating_range[1])
-            ]
+                mask &= (df['disponibilite'] == selected_availability).to_numpy()
+            prix_arr = df['prix'].to_numpy()
+            note_arr = df['note_moyenne'].to_numpy()
+            mask &= (prix_arr >= price_range[0]) & (prix_arr <= price_range[1])
+            mask &= (note_arr >= rating_range[0]) & (note_arr <= rating_range[1])
+            filtered_df = df.loc[mask]
             
             # Tri
             sort_options = {
@@ -1078,7 +1580,20 @@ def main():
             
             selected_sort = st.selectbox("Tri", list(sort_options.keys()))
             sort_column, ascending = sort_options[selected_sort]
-            filtered_df = filtered_df.sort_values(by=sort_column, ascending=ascending)
+            # Tri par argsort stable sur la seule colonne clé: les chaînes
+            # (titre) passent par des codes catégoriels, donc le tri compare
+            # des entiers en C au lieu d'objets str Python
+            key_col = filtered_df[sort_column]
+            if isinstance(key_col.dtype, pd.CategoricalDtype):
+                keys = key_col.cat.codes.to_numpy()
+            elif key_col.dtype == object:
+                keys = pd.Categorical(key_col).codes
+            else:
+                keys = key_col.to_numpy()
+            order = np.argsort(keys, kind='stable')
+            if not ascending:
+                order = order[::-1]
+            filtered_df = filtered_df.iloc[order]
             
             # Affichage du tableau
             st.subheader(f"📋 Données Filtrées ({len(filtered_df)}/{len(df)} produits)")
@@ -1129,7 +1644,8 @@ def main():
                 )
                 
                 top_5_filename = f"top_5_produits_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                st.markdown(create_download_link(top_5_products, top_5_filename), unsafe_allow_html=True)
+                _download_button(top_5_products, top_5_filename,
+                                 cache_key=('top5', st.session_state.get('top5_n')))
             else:
                 st.warning("Impossible de générer les recommandations. Vérifiez le modèle ou les logs.")
             
@@ -1139,7 +1655,10 @@ def main():
             
             with col1:
                 filename = f"produits_scrapes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                st.markdown(create_download_link(filtered_df, filename), unsafe_allow_html=True)
+                _download_button(filtered_df, filename,
+                                 cache_key=('filtre', len(df), selected_category,
+                                            selected_source, selected_availability,
+                                            price_range, rating_range))
             
             with col2:
                 if st.button("🔄 Actualiser les données"):
@@ -1147,12 +1666,15 @@ def main():
             
             with col3:
                 if st.button("🗑️ Supprimer les données filtrées"):
-                    indices_to_remove = filtered_df.index.tolist()
+                    # Masque booléen numpy: marquage des lignes filtrées en C
+                    # puis un seul gather des indices conservés
+                    products = st.session_state.scraped_products
+                    keep = np.ones(len(products), dtype=bool)
+                    keep[filtered_df.index.to_numpy(dtype=np.intp)] = False
                     st.session_state.scraped_products = [
-                        product for i, product in enumerate(st.session_state.scraped_products) 
-                        if i not in indices_to_remove
+                        products[i] for i in np.flatnonzero(keep).tolist()
                     ]
-                    st.success(f"{len(indices_to_remove)} produits supprimés!")
+                    st.success(f"{len(filtered_df)} produits supprimés!")
                     st.rerun()
             
         else:
@@ -1162,10 +1684,10 @@ def main():
         st.header("📈 Analyses et Visualisations")
         
         if st.session_state.scraped_products:
-            df = pd.DataFrame(st.session_state.scraped_products)
+            df = _session_df()
             
             st.subheader("Répartition par Catégorie")
-            category_counts = df['categorie'].value_counts()
+            category_counts = _category_summary(df)['count'].sort_values(ascending=False)
             fig_pie = px.pie(
                 values=category_counts.values, 
                 names=category_counts.index,
@@ -1182,7 +1704,7 @@ def main():
             st.plotly_chart(fig_hist, use_container_width=True)
             
             st.subheader("Notes Moyennes par Catégorie")
-            avg_ratings = df.groupby('categorie')['note_moyenne'].mean().sort_values(ascending=False)
+            avg_ratings = _category_summary(df)['mean_note'].sort_values(ascending=False)
             fig_bar = px.bar(
                 x=avg_ratings.index, y=avg_ratings.values,
                 title="Note moyenne par catégorie",
@@ -1199,12 +1721,8 @@ def main():
             st.plotly_chart(fig_scatter, use_container_width=True)
             
             st.subheader("Statistiques par Source")
-            source_stats = df.groupby('source').agg({
-                'titre': 'count',
-                'prix': 'mean',
-                'note_moyenne': 'mean'
-            }).round(2)
-            source_stats.columns = ['Nombre de produits', 'Prix moyen (€)', 'Note moyenne']
+            source_stats = _source_summary(df)[['titre', 'prix', 'note_moyenne']].set_axis(
+                ['Nombre de produits', 'Prix moyen (€)', 'Note moyenne'], axis=1)
             st.dataframe(source_stats, use_container_width=True)
             
         else:
@@ -1263,9 +1781,13 @@ def main():
                 with st.spinner("🧠 Raisonnement en cours..."):
                     df = None
                     if st.session_state.scraped_products:
-                        df = pd.DataFrame(st.session_state.scraped_products)
+                        df = _session_df()
                         df = st.session_state.chat_interface.validate_data(df)
-                    
+                        # Agrégats rafraîchis seulement quand les données changent
+                        if df is not None and st.session_state.get('cot_stats_n') != len(df):
+                            st.session_state.cot_stats = CoTChatInterface.precompute_stats(df)
+                            st.session_state.cot_stats_n = len(df)
+
                     response = st.session_state.chat_interface.handle_chat_query(prompt, df)
                     st.markdown(response)
             
@@ -1274,7 +1796,7 @@ def main():
         
         # Visualisations et analyse détaillée
         if st.session_state.scraped_products:
-            df = pd.DataFrame(st.session_state.scraped_products)
+            df = _session_df()
             df = st.session_state.chat_interface.validate_data(df)
             
             if df is not None:
@@ -2,9 +2,9 @@ import streamlit as st
 import pandas as pd
 import os
 import json
+import re
 from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
+import altair as alt
 import joblib
 import numpy as np
 
@@ -54,72 +54,167 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Helper functions
+def _file_mtime(path):
+    """Modification time of a file, or None if it does not exist"""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+# Only the columns the dashboard actually renders, with numeric dtypes
+# declared up front so the parser skips type inference
+_DATA_COLS = ['titre', 'prix', 'note_moyenne', 'categorie', 'vendeur']
+_DATA_DTYPES = {'prix': 'float32', 'note_moyenne': 'float32'}
+
+# The mtime argument is part of the cache key: the cached entry is reused
+# across reruns (and chat turns) and only re-parsed when the scraper
+# rewrites the file on disk.
+@st.cache_data(show_spinner=False)
+def _read_csv_cached(path, mtime, sep=','):
+    return pd.read_csv(path, sep=sep)
+
+@st.cache_data(show_spinner=False)
+def _read_products_cached(path, mtime):
+    # Parquet sidecar: st.cache_data covers reruns within a process, the
+    # sidecar covers cold starts - a columnar read with dtypes already
+    # materialized instead of re-parsing CSV text
+    pq_path = path + '.parquet'
+    pq_mtime = _file_mtime(pq_path)
+    if pq_mtime is not None and pq_mtime >= mtime:
+        try:
+            return pd.read_parquet(pq_path)
+        except Exception:
+            pass  # sidecar unreadable: re-parse the CSV and rewrite it
+    try:
+        # Multi-threaded Arrow CSV parser, restricted to the used columns
+        df = pd.read_csv(path, sep=';', engine='pyarrow',
+                         usecols=_DATA_COLS, dtype=_DATA_DTYPES)
+    except (ImportError, ValueError):
+        # Fall back to the C parser and tolerate a different column set
+        df = pd.read_csv(path, sep=';', dtype=_DATA_DTYPES)
+        df = df[[c for c in _DATA_COLS if c in df.columns]]
+    # Category dtype: filters, nunique and value_counts run on int codes
+    for col in ('categorie', 'vendeur'):
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    try:
+        df.to_parquet(pq_path)
+    except Exception:
+        pass  # no parquet engine or read-only volume: CSV path still works
+    return df
+
+@st.cache_resource(show_spinner=False)
+def _load_model_cached(path, mtime):
+    return joblib.load(path)
+
 def load_data():
     """Load the scraped product data"""
+    mtime = _file_mtime(SCRAPED_DATA_PATH)
+    if mtime is None:
+        st.error(f"Data file not found at {SCRAPED_DATA_PATH}")
+        return None
     try:
-        if os.path.exists(SCRAPED_DATA_PATH):
-            df = pd.read_csv(SCRAPED_DATA_PATH, sep=';')
-            return df
-        else:
-            st.error(f"Data file not found at {SCRAPED_DATA_PATH}")
-            return None
+        return _read_products_cached(SCRAPED_DATA_PATH, mtime)
     except Exception as e:
         st.error(f"Error loading data: {e}")
         return None
 
 def load_top_products():
     """Load the top products identified by the ML model"""
+    mtime = _file_mtime(TOP_PRODUCTS_PATH)
+    if mtime is None:
+        st.warning(f"Top products file not found at {TOP_PRODUCTS_PATH}")
+        return None
     try:
-        if os.path.exists(TOP_PRODUCTS_PATH):
-            df = pd.read_csv(TOP_PRODUCTS_PATH)
-            return df
-        else:
-            st.warning(f"Top products file not found at {TOP_PRODUCTS_PATH}")
-            return None
+        return _read_csv_cached(TOP_PRODUCTS_PATH, mtime)
     except Exception as e:
         st.error(f"Error loading top products: {e}")
         return None
 
 def load_model():
     """Load the trained ML model"""
+    mtime = _file_mtime(MODEL_PATH)
+    if mtime is None:
+        st.warning(f"Model file not found at {MODEL_PATH}")
+        return None
     try:
-        if os.path.exists(MODEL_PATH):
-            model = joblib.load(MODEL_PATH)
-            return model
-        else:
-            st.warning(f"Model file not found at {MODEL_PATH}")
-            return None
+        return _load_model_cached(MODEL_PATH, mtime)
     except Exception as e:
         st.error(f"Error loading model: {e}")
         return None
 
+@st.cache_data(show_spinner=False)
+def _product_arrays(df):
+    """Contiguous numeric arrays of the product frame (SoA layout).
+
+    Filters and rankings only need prices, ratings and category codes;
+    keeping them as dense float32/int arrays means the mask passes never
+    drag the object-dtype title and vendor columns through cache. The
+    DataFrame itself is only indexed to render the selected rows.
+    """
+    cats = pd.Categorical(df['categorie'])
+    return {
+        'prix': np.ascontiguousarray(df['prix'].to_numpy(np.float32)),
+        'note': np.ascontiguousarray(df['note_moyenne'].to_numpy(np.float32)),
+        'cat_codes': cats.codes.copy(),
+        'categories': tuple(cats.categories),
+    }
+
+@st.cache_data(show_spinner=False)
+def _category_options(df):
+    """Filter choices for Tab 2: the categorical's label list instead of
+    a unique() pass over the whole column on every rerun"""
+    return ['All'] + sorted(_product_arrays(df)['categories'])
+
+@st.cache_data(show_spinner=False)
+def _price_capped(df):
+    """Rows at or below the 95th price percentile, shared by the price
+    histogram and the rating scatter so the cap is materialized once per
+    frame instead of once per plot per rerun"""
+    return df[df['prix'] <= summarize(df)['price_q95']]
+
+@st.cache_data(show_spinner=False)
+def summarize(df):
+    """Summary statistics shared by the metric cards and plots.
+
+    These are pure functions of the cached DataFrame; computing them once
+    per frame removes the full-column scans from every rerun.
+    """
+    return {
+        'n': len(df),
+        'n_cat': df['categorie'].nunique(),
+        'avg_price': df['prix'].mean(),
+        'avg_rating': df['note_moyenne'].mean(),
+        'cat_top10': df['categorie'].value_counts().head(10),
+        'price_q95': df['prix'].quantile(0.95),
+    }
+
 def display_metrics(df):
     """Display key metrics about the dataset"""
+    summary = summarize(df)
     col1, col2, col3, col4 = st.columns(4)
-    
+
     with col1:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        st.markdown(f'<div class="metric-value">{len(df)}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="metric-value">{summary["n"]}</div>', unsafe_allow_html=True)
         st.markdown('<div class="metric-label">Total Products</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
-    
+
     with col2:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        st.markdown(f'<div class="metric-value">{df["categorie"].nunique()}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="metric-value">{summary["n_cat"]}</div>', unsafe_allow_html=True)
         st.markdown('<div class="metric-label">Categories</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
-    
+
     with col3:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        avg_price = df["prix"].mean()
-        st.markdown(f'<div class="metric-value">${avg_price:.2f}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="metric-value">${summary["avg_price"]:.2f}</div>', unsafe_allow_html=True)
         st.markdown('<div class="metric-label">Average Price</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
-    
+
     with col4:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        avg_rating = df["note_moyenne"].mean()
-        st.markdown(f'<div class="metric-value">{avg_rating:.1f}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="metric-value">{summary["avg_rating"]:.1f}</div>', unsafe_allow_html=True)
         st.markdown('<div class="metric-label">Average Rating</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
@@ -127,57 +222,94 @@ def plot_category_distribution(df):
     """Plot the distribution of products by category"""
     st.markdown('<div class="sub-header">Product Distribution by Category</div>', unsafe_allow_html=True)
     
-    # Get top categories
-    category_counts = df['categorie'].value_counts().head(10)
-    
-    # Create figure
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.barplot(x=category_counts.values, y=category_counts.index, palette='viridis', ax=ax)
-    ax.set_title('Top 10 Categories by Product Count')
-    ax.set_xlabel('Number of Products')
-    ax.set_ylabel('Category')
-    
-    st.pyplot(fig)
+    # Get top categories (precomputed once per frame)
+    category_counts = summarize(df)['cat_top10']
+
+    # Native Vega bar chart: no server-side figure rendering or PNG
+    # encoding per rerun, the browser draws from the aggregated counts
+    chart = alt.Chart(
+        category_counts.rename_axis('categorie').reset_index(name='count')
+    ).mark_bar().encode(
+        x=alt.X('count:Q', title='Number of Products'),
+        y=alt.Y('categorie:N', sort='-x', title='Category'),
+    ).properties(title='Top 10 Categories by Product Count')
+
+    st.altair_chart(chart, use_container_width=True)
 
 def plot_price_distribution(df):
     """Plot the distribution of product prices"""
     st.markdown('<div class="sub-header">Price Distribution</div>', unsafe_allow_html=True)
     
     # Filter out extreme values for better visualization
-    price_df = df[df['prix'] <= df['prix'].quantile(0.95)]
-    
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.histplot(price_df['prix'], kde=True, bins=30, ax=ax)
-    ax.set_title('Price Distribution (excluding top 5% for better visualization)')
-    ax.set_xlabel('Price')
-    ax.set_ylabel('Count')
-    
-    st.pyplot(fig)
+    price_df = _price_capped(df)
+
+    # Bin server-side with np.histogram: only 30 bar rows enter the Vega
+    # spec, so large catalogs never hit Altair's inline-row limit and the
+    # browser receives counts instead of every price
+    prices = price_df['prix'].to_numpy(dtype=np.float64)
+    prices = prices[~np.isnan(prices)]
+    counts, edges = np.histogram(prices, bins=30)
+    hist = pd.DataFrame({'prix': edges[:-1], 'prix2': edges[1:], 'count': counts})
+    chart = alt.Chart(hist).mark_bar().encode(
+        x=alt.X('prix:Q', title='Price'),
+        x2='prix2:Q',
+        y=alt.Y('count:Q', title='Count'),
+    ).properties(title='Price Distribution (excluding top 5% for better visualization)')
+
+    st.altair_chart(chart, use_container_width=True)
 
 def plot_rating_vs_price(df):
     """Plot the relationship between ratings and prices"""
     st.markdown('<div class="sub-header">Rating vs Price</div>', unsafe_allow_html=True)
     
     # Filter out extreme values for better visualization
-    plot_df = df[df['prix'] <= df['prix'].quantile(0.95)]
-    
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.scatterplot(x='prix', y='note_moyenne', data=plot_df, alpha=0.6, ax=ax)
-    ax.set_title('Product Ratings vs Price')
-    ax.set_xlabel('Price')
-    ax.set_ylabel('Rating')
-    
-    st.pyplot(fig)
+    plot_df = _price_capped(df)
+
+    if len(plot_df) > 5000:
+        # Large frames: aggregate server-side into a density grid so the
+        # chart stays O(bins) instead of shipping one mark per product
+        prix = plot_df['prix'].to_numpy(dtype=np.float64)
+        note = plot_df['note_moyenne'].to_numpy(dtype=np.float64)
+        valid = ~(np.isnan(prix) | np.isnan(note))
+        counts, x_edges, y_edges = np.histogram2d(prix[valid], note[valid], bins=(80, 40))
+        xi, yi = np.nonzero(counts)
+        heat = pd.DataFrame({
+            'prix': x_edges[xi],
+            'prix2': x_edges[xi + 1],
+            'note': y_edges[yi],
+            'note2': y_edges[yi + 1],
+            'count': counts[xi, yi],
+        })
+        chart = alt.Chart(heat).mark_rect().encode(
+            x=alt.X('prix:Q', title='Price'),
+            x2='prix2:Q',
+            y=alt.Y('note:Q', title='Rating'),
+            y2='note2:Q',
+            color=alt.Color('count:Q', title='Products',
+                            scale=alt.Scale(scheme='viridis')),
+        ).properties(title='Product Ratings vs Price (density)')
+    else:
+        chart = alt.Chart(plot_df[['prix', 'note_moyenne']]).mark_circle(
+            opacity=0.4
+        ).encode(
+            x=alt.X('prix:Q', title='Price'),
+            y=alt.Y('note_moyenne:Q', title='Rating'),
+        ).properties(title='Product Ratings vs Price')
+
+    st.altair_chart(chart, use_container_width=True)
 
 def display_top_products(top_df):
     """Display the top products identified by the ML model"""
     st.markdown('<div class="sub-header">Top Products by Attractiveness Score</div>', unsafe_allow_html=True)
     
     if top_df is not None:
-        # Format the dataframe for display
-        display_df = top_df.copy()
-        if 'score_attractivite' in display_df.columns:
-            display_df['score_attractivite'] = display_df['score_attractivite'].round(2)
+        # Format the dataframe for display (assign copies only when there
+        # is actually a score column to round)
+        if 'score_attractivite' in top_df.columns:
+            display_df = top_df.assign(
+                score_attractivite=top_df['score_attractivite'].round(2))
+        else:
+            display_df = top_df
         
         # Display as a table
         st.dataframe(
@@ -210,55 +342,91 @@ def display_chat_interface():
         with st.container():
             st.markdown(f"**{message['role'].title()}**: {message['content']}")
     
-    # Chat input
+    # Chat input. The new exchange is rendered in place instead of
+    # triggering st.rerun(), which re-executed the whole script (all tabs,
+    # metrics and charts) for every chat turn; the next natural rerun
+    # picks the messages up from session state. last_prompt guards
+    # against re-answering the same input on unrelated reruns.
     if prompt := st.text_input("Your question:", key="chat_input"):
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        
-        # Simple response logic based on keywords
-        response = generate_recommendation(prompt)
-        st.session_state.messages.append({"role": "assistant", "content": response})
-        
-        # Rerun to display the new messages
-        st.rerun()
+        if prompt != st.session_state.get("last_prompt"):
+            st.session_state.last_prompt = prompt
+            st.session_state.messages.append({"role": "user", "content": prompt})
+
+            # Simple response logic based on keywords
+            response = generate_recommendation(prompt)
+            st.session_state.messages.append({"role": "assistant", "content": response})
+
+            st.markdown(f"**User**: {prompt}")
+            st.markdown(f"**Assistant**: {response}")
+
+@st.cache_data(show_spinner=False)
+def _build_keyword_index(df):
+    """Build a keyword -> row-indices map for the recommendation chat.
+
+    The chat handler used to run two full-frame regex scans per message;
+    here titles and categories are scanned once per cached DataFrame and
+    each keyword resolves to the positional indices of matching rows.
+    """
+    elec = df['categorie'].astype(str).str.contains(
+        'Electronics', case=False, na=False).to_numpy()
+    titles = df['titre'].astype(str).str.lower()
+    return {
+        keyword: np.flatnonzero(
+            elec & titles.str.contains(pattern, na=False, regex=True).to_numpy())
+        for keyword, pattern in (('laptop', 'laptop'),
+                                 ('phone', 'smartphone|phone'),
+                                 ('tablet', 'tablet'))
+    }
+
+def _best_rated(df, idx):
+    """Highest-rated row among the given positional indices, or None"""
+    if len(idx) == 0:
+        return None
+    ratings = _product_arrays(df)['note'][idx]
+    try:
+        # Single pass, no sort and no sanitized copy of the ratings
+        best = int(np.nanargmax(ratings))
+    except ValueError:  # all ratings NaN: fall back to the first match
+        best = 0
+    return df.iloc[idx[best]]
+
+# Single compiled router: one scan of the prompt tags every intent via
+# named groups, instead of up to six substring tests per message. The
+# dispatch below keeps the original ladder priority (laptop first).
+_ROUTER_RE = re.compile(
+    r'(?:(?P<laptop>laptop|computer)'
+    r'|(?P<phone>smartphone|phone)'
+    r'|(?P<tablet>tablet)'
+    r'|(?P<best>best|top))'
+)
+
+# intent -> noun used in the "no recommendations" reply
+_INTENT_NOUNS = (('laptop', 'laptop'), ('phone', 'smartphone'), ('tablet', 'tablet'))
 
 def generate_recommendation(prompt):
     """Generate a simple product recommendation based on user input"""
     prompt_lower = prompt.lower()
-    
-    # Load data for recommendations
+
+    # Load data for recommendations (cached across chat turns)
     df = load_data()
     if df is None:
         return "I'm sorry, I can't access the product database at the moment."
-    
-    # Simple keyword matching
-    if "laptop" in prompt_lower or "computer" in prompt_lower:
-        products = df[df['categorie'].str.contains('Electronics', case=False, na=False) & 
-                     df['titre'].str.contains('Laptop', case=False, na=False)]
-        if len(products) > 0:
-            top_product = products.sort_values('note_moyenne', ascending=False).iloc[0]
-            return f"I recommend {top_product['titre']} with a rating of {top_product['note_moyenne']:.1f}/5. It costs ${top_product['prix']:.2f}."
-        else:
-            return "I don't have any laptop recommendations at the moment."
-    
-    elif "phone" in prompt_lower or "smartphone" in prompt_lower:
-        products = df[df['categorie'].str.contains('Electronics', case=False, na=False) & 
-                     df['titre'].str.contains('Smartphone|Phone', case=False, na=False, regex=True)]
-        if len(products) > 0:
-            top_product = products.sort_values('note_moyenne', ascending=False).iloc[0]
-            return f"I recommend {top_product['titre']} with a rating of {top_product['note_moyenne']:.1f}/5. It costs ${top_product['prix']:.2f}."
-        else:
-            return "I don't have any smartphone recommendations at the moment."
-    
-    elif "tablet" in prompt_lower:
-        products = df[df['categorie'].str.contains('Electronics', case=False, na=False) & 
-                     df['titre'].str.contains('Tablet', case=False, na=False)]
-        if len(products) > 0:
-            top_product = products.sort_values('note_moyenne', ascending=False).iloc[0]
+
+    intents = {m.lastgroup for m in _ROUTER_RE.finditer(prompt_lower)}
+
+    # Keyword lookup against the precomputed index: O(1) dict hit plus an
+    # argmax over the few matching rows instead of regex scans per turn
+    keyword_index = _build_keyword_index(df)
+    for intent, noun in _INTENT_NOUNS:
+        if intent not in intents:
+            continue
+        top_product = _best_rated(df, keyword_index[intent])
+        if top_product is not None:
             return f"I recommend {top_product['titre']} with a rating of {top_product['note_moyenne']:.1f}/5. It costs ${top_product['prix']:.2f}."
         else:
-            return "I don't have any tablet recommendations at the moment."
-    
-    elif "best" in prompt_lower or "top" in prompt_lower:
+            return f"I don't have any {noun} recommendations at the moment."
+
+    if "best" in intents:
         top_products = load_top_products()
         if top_products is not None and len(top_products) > 0:
             top_product = top_products.iloc[0]
@@ -306,22 +474,35 @@ def main():
         # Filters
         col1, col2 = st.columns(2)
         with col1:
-            categories = ['All'] + sorted(df['categorie'].unique().tolist())
+            categories = _category_options(df)
             selected_category = st.selectbox('Filter by Category', categories)
         
         with col2:
             min_rating = st.slider('Minimum Rating', 0.0, 5.0, 0.0, 0.5)
         
-        # Apply filters
-        filtered_df = df.copy()
-        if selected_category != 'All':
-            filtered_df = filtered_df[filtered_df['categorie'] == selected_category]
-        
-        filtered_df = filtered_df[filtered_df['note_moyenne'] >= min_rating]
+        # Apply filters: one combined boolean mask over the dense numeric
+        # arrays and a single take - no frame copy, no object columns
+        # touched until the matching rows are rendered
+        if selected_category == 'All' and min_rating <= 0.0:
+            # Default filters select everything: reuse the cached frame
+            # instead of gathering a full copy of it
+            filtered_df = df
+        else:
+            arrays = _product_arrays(df)
+            mask = arrays['note'] >= min_rating
+            if selected_category != 'All':
+                try:
+                    code = arrays['categories'].index(selected_category)
+                except ValueError:
+                    code = -2  # unknown category: matches nothing
+                # integer code compare over contiguous codes
+                mask &= arrays['cat_codes'] == code
+            filtered_df = df.iloc[np.flatnonzero(mask)]
         
-        # Display filtered data
+        # Display filtered data - only the first 500 rows are serialized
+        # to the browser; the full selection stays available as a download
         st.dataframe(
-            filtered_df,
+            filtered_df.head(500),
             column_config={
                 "titre": "Product Name",
                 "prix": st.column_config.NumberColumn("Price", format="$%.2f"),
@@ -332,6 +513,14 @@ def main():
             hide_index=True,
             use_container_width=True
         )
+        if len(filtered_df) > 500:
+            st.caption(f"Showing the first 500 of {len(filtered_df)} matching products.")
+            st.download_button(
+                "Download full selection (CSV)",
+                filtered_df.to_csv(index=False).encode('utf-8'),
+                file_name="filtered_products.csv",
+                mime="text/csv"
+            )
         
         # Additional analysis
         plot_rating_vs_price(filtered_df)